@@ -0,0 +1,39 @@
+# Production server settings: gunicorn -c gunicorn.conf.py server:app
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+# One worker per core unless WEB_CONCURRENCY says otherwise
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Every worker holds its own dataset snapshot; watching the file lets a
+# changed dataset, or an admin reload served by any worker, reach them all
+if workers > 1:
+    os.environ.setdefault("DATASET_WATCH_INTERVAL", "5")
+# Uvicorn picks uvloop and httptools when they are installed
+worker_class = "uvicorn.workers.UvicornWorker"
+# Load the dataset and build its indexes once, before forking, so workers
+# share those pages copy-on-write instead of each building their own
+preload_app = True
+# The collector is off while the app loads, so no freed holes are left
+# between the long-lived objects; see pre_fork and post_fork
+gc.disable()
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+accesslog = os.environ.get("ACCESS_LOG") or None
+
+def pre_fork(server, worker):
+    # Move the preloaded snapshot into the permanent generation: collections
+    # in the workers then never write to its object headers, which would
+    # un-share those pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    gc.enable()
+
+def child_exit(server, worker):
+    # Drop the live gauges of a dead worker from the aggregated metrics
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
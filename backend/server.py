@@ -1,14 +1,74 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, Optional
 import os
+import sys
+import hmac
+import asyncio
+import csv
+import gzip
 import json
+import math
+import mmap
+import struct
+from array import array
+import time
 import uuid
-from collections import Counter
+import argparse
+import hashlib
+import heapq
+import logging
+import itertools
+import threading
+import contextvars
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import re
+import numpy as np
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter as MetricCounter, Histogram, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
-app = FastAPI()
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background tasks alongside the server and release shared clients on shutdown"""
+    watcher = None
+    if DATASET_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_medical_data(MEDICAL_DATA_PATH, DATASET_WATCH_INTERVAL))
+    SCORING_EXECUTOR.start()
+    app.state.ready = True
+    yield
+    # Fail readiness first so the proxy stops routing here while requests drain
+    app.state.ready = False
+    if watcher is not None:
+        watcher.cancel()
+    SCORING_EXECUTOR.shutdown()
+    await REDIS_CACHE.close()
+
+app = FastAPI(lifespan=lifespan)
+app.state.ready = False
 
 # CORS middleware
 app.add_middleware(
@@ -17,342 +77,306 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
-# Medical data - comprehensive dataset based on provided structure
-MEDICAL_DATA = [
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Fungal infection",
-        "symptoms": ["itching", "skin_rash", "nodal_skin_eruptions", "dischromic_patches"],
-        "description": "A fungal infection is a disease caused by fungus. Common types include athlete's foot, ringworm, and yeast infections.",
-        "precautions": ["bath twice", "use detol or neem in bathing water", "keep infected area dry", "use clean cloths"],
-        "medicines": ["antifungal cream", "fluconazole", "terbinafine", "itraconazole"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Allergy",
-        "symptoms": ["continuous_sneezing", "shivering", "chills", "watering_from_eyes"],
-        "description": "An allergy is a reaction by your immune system to something that does not bother most other people.",
-        "precautions": ["apply sunscreen", "avoid dust", "avoid pollen", "keep windows closed"],
-        "medicines": ["antihistamine", "cetirizine", "loratadine", "nasal decongestant"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "GERD",
-        "symptoms": ["stomach_pain", "acidity", "ulcers_on_tongue", "vomiting", "cough", "chest_pain"],
-        "description": "Gastroesophageal reflux disease (GERD) occurs when stomach acid frequently flows back into the tube connecting your mouth and stomach.",
-        "precautions": ["avoid fatty spicy food", "avoid lying down after eating", "maintain healthy weight", "limit caffeine"],
-        "medicines": ["omeprazole", "lansoprazole", "ranitidine", "antacids"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Chronic cholestasis",
-        "symptoms": ["itching", "vomiting", "yellowish_skin", "nausea", "loss_of_appetite", "abdominal_pain"],
-        "description": "Chronic cholestasis is a condition where bile flow from the liver is reduced or stopped.",
-        "precautions": ["cold baths", "anti itch medicine", "avoid fatty foods", "small frequent meals"],
-        "medicines": ["ursodeoxycholic acid", "cholestyramine", "rifampin", "naltrexone"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Drug Reaction",
-        "symptoms": ["itching", "skin_rash", "burning_micturition", "spotting_urination"],
-        "description": "An adverse drug reaction is an injury caused by taking medication.",
-        "precautions": ["stop irritation", "consult nearest hospital", "stop taking drug", "follow up"],
-        "medicines": ["antihistamine", "corticosteroids", "epinephrine", "supportive care"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Peptic ulcer disease",
-        "symptoms": ["vomiting", "indigestion", "loss_of_appetite", "abdominal_pain", "passage_of_gases"],
-        "description": "Peptic ulcer disease refers to painful sores or ulcers in the lining of the stomach or first part of the small intestine.",
-        "precautions": ["avoid fatty spicy food", "consume probiotic food", "eliminate milk", "limit alcohol"],
-        "medicines": ["proton pump inhibitors", "antibiotics", "bismuth subsalicylate", "sucralfate"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "AIDS",
-        "symptoms": ["muscle_wasting", "patches_in_throat", "high_fever", "extra_marital_contacts"],
-        "description": "Acquired immunodeficiency syndrome (AIDS) is a chronic, potentially life-threatening condition caused by HIV.",
-        "precautions": ["avoid open cuts", "wear ppe if possible", "consult doctor", "follow up"],
-        "medicines": ["antiretroviral therapy", "zidovudine", "efavirenz", "tenofovir"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Diabetes",
-        "symptoms": ["fatigue", "weight_loss", "restlessness", "lethargy", "irregular_sugar_level", "blurred_and_distorted_vision", "obesity", "excessive_hunger"],
-        "description": "Diabetes is a group of metabolic disorders characterized by a high blood sugar level over a prolonged period of time.",
-        "precautions": ["have balanced diet", "exercise", "consult doctor", "follow up"],
-        "medicines": ["metformin", "insulin", "glipizide", "glyburide"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Gastroenteritis",
-        "symptoms": ["vomiting", "sunken_eyes", "dehydration", "diarrhoea"],
-        "description": "Gastroenteritis is inflammation of the lining of the intestines caused by a virus, bacteria or parasites.",
-        "precautions": ["stop eating solid food for while", "try to take liquid", "rest", "ease back into eating"],
-        "medicines": ["oral rehydration salts", "zinc supplements", "probiotics", "loperamide"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Bronchial Asthma",
-        "symptoms": ["fatigue", "cough", "high_fever", "breathlessness", "family_history", "mucoid_sputum"],
-        "description": "Bronchial asthma is a lung disease that makes it hard to breathe when the airways become inflamed and narrowed.",
-        "precautions": ["switch to loose cloothing", "take deep breaths", "get away from trigger", "seek help"],
-        "medicines": ["albuterol", "beclomethasone", "montelukast", "theophylline"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hypertension",
-        "symptoms": ["headache", "chest_pain", "dizziness", "loss_of_balance", "lack_of_concentration"],
-        "description": "Hypertension (high blood pressure) is a condition in which the force of the blood against the artery walls is too high.",
-        "precautions": ["meditation", "salt baths", "reduce stress", "get proper sleep"],
-        "medicines": ["amlodipine", "lisinopril", "hydrochlorothiazide", "metoprolol"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Migraine",
-        "symptoms": ["acidity", "indigestion", "headache", "blurred_and_distorted_vision", "excessive_hunger", "stiff_neck", "depression", "irritability", "visual_disturbances"],
-        "description": "A migraine is a headache that can cause severe throbbing pain or a pulsing sensation, usually on one side of the head.",
-        "precautions": ["meditation", "reduce stress", "use poloroid glasses in sun", "consult doctor"],
-        "medicines": ["sumatriptan", "rizatriptan", "topiramate", "propranolol"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Cervical spondylosis",
-        "symptoms": ["back_pain", "weakness_in_limbs", "neck_pain", "dizziness", "loss_of_balance"],
-        "description": "Cervical spondylosis is a general term for age-related wear and tear affecting the spinal disks in your neck.",
-        "precautions": ["use heating pad or cold pack", "exercise", "take otc pain reliver", "consult doctor"],
-        "medicines": ["ibuprofen", "naproxen", "muscle relaxants", "gabapentin"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Paralysis (brain hemorrhage)",
-        "symptoms": ["vomiting", "headache", "weakness_of_one_body_side", "altered_sensorium"],
-        "description": "Paralysis is the loss of muscle function in part of your body, often caused by brain hemorrhage.",
-        "precautions": ["massage", "eat healthy", "exercise", "consult doctor"],
-        "medicines": ["physiotherapy", "speech therapy", "occupational therapy", "anticoagulants"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Jaundice",
-        "symptoms": ["itching", "vomiting", "fatigue", "weight_loss", "high_fever", "headache", "nausea", "loss_of_appetite", "pain_behind_the_eyes", "back_pain", "constipation", "abdominal_pain", "diarrhoea", "mild_fever", "yellowing_of_eyes"],
-        "description": "Jaundice is a condition in which the skin, whites of the eyes and mucous membranes turn yellow because of a high level of bilirubin.",
-        "precautions": ["drink plenty of water", "consume milk thistle", "eat fruits and high fiberous food", "medication"],
-        "medicines": ["ursodeoxycholic acid", "phenobarbital", "cholestyramine", "vitamin K"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Malaria",
-        "symptoms": ["chills", "vomiting", "high_fever", "sweating", "headache", "nausea", "diarrhoea", "muscle_pain"],
-        "description": "Malaria is a disease caused by a parasite that commonly infects a certain type of mosquito which feeds on humans.",
-        "precautions": ["consult nearest hospital", "avoid oily food", "avoid non veg food", "keep mosquitos out"],
-        "medicines": ["artemether-lumefantrine", "chloroquine", "doxycycline", "mefloquine"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Chicken pox",
-        "symptoms": ["itching", "skin_rash", "fatigue", "lethargy", "high_fever", "headache", "loss_of_appetite", "mild_fever"],
-        "description": "Chickenpox is a highly contagious disease caused by the varicella-zoster virus (VZV).",
-        "precautions": ["use neem in bathing", "consume neem leaves", "take vaccine", "avoid public places"],
-        "medicines": ["acyclovir", "valacyclovir", "calamine lotion", "paracetamol"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Dengue",
-        "symptoms": ["skin_rash", "chills", "joint_pain", "vomiting", "fatigue", "high_fever", "headache", "nausea", "loss_of_appetite", "pain_behind_the_eyes", "back_pain", "malaise", "muscle_pain", "red_spots_over_body"],
-        "description": "Dengue is a mosquito-borne tropical disease caused by the dengue virus.",
-        "precautions": ["drink papaya leaf juice", "avoid fatty spicy food", "keep mosquitos away", "keep hydrated"],
-        "medicines": ["paracetamol", "oral rehydration therapy", "platelet transfusion", "supportive care"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Typhoid",
-        "symptoms": ["chills", "vomiting", "fatigue", "high_fever", "headache", "nausea", "constipation", "abdominal_pain", "diarrhoea", "toxic_look_(typhos)", "belly_pain"],
-        "description": "Typhoid fever is a bacterial infection due to a specific type of Salmonella that causes symptoms.",
-        "precautions": ["eat high calorie vegitables", "antiboitic therapy", "consult doctor", "medication"],
-        "medicines": ["ciprofloxacin", "azithromycin", "ceftriaxone", "chloramphenicol"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "hepatitis A",
-        "symptoms": ["joint_pain", "vomiting", "yellowish_skin", "dark_urine", "nausea", "loss_of_appetite", "abdominal_pain", "diarrhoea", "mild_fever", "yellowing_of_eyes", "muscle_pain"],
-        "description": "Hepatitis A is a viral infection that causes liver inflammation and damage.",
-        "precautions": ["consult nearest hospital", "wash hands through", "avoid fatty spicy food", "medication"],
-        "medicines": ["supportive care", "rest", "adequate hydration", "hepatitis A vaccine"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hepatitis B",
-        "symptoms": ["itching", "fatigue", "lethargy", "yellowish_skin", "dark_urine", "loss_of_appetite", "abdominal_pain", "yellowing_of_eyes"],
-        "description": "Hepatitis B is a viral infection that attacks the liver and can cause both acute and chronic disease.",
-        "precautions": ["consult nearest hospital", "vaccination", "eat healthy", "medication"],
-        "medicines": ["tenofovir", "entecavir", "lamivudine", "interferon alpha"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hepatitis C",
-        "symptoms": ["fatigue", "yellowish_skin", "nausea", "loss_of_appetite", "yellowing_of_eyes", "family_history"],
-        "description": "Hepatitis C is a viral infection caused by the hepatitis C virus (HCV) that attacks the liver.",
-        "precautions": ["consult nearest hospital", "vaccination", "eat healthy", "medication"],
-        "medicines": ["sofosbuvir", "ledipasvir", "daclatasvir", "ribavirin"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hepatitis D",
-        "symptoms": ["joint_pain", "vomiting", "fatigue", "yellowish_skin", "dark_urine", "nausea", "loss_of_appetite", "abdominal_pain", "yellowing_of_eyes"],
-        "description": "Hepatitis D is a liver infection caused by the hepatitis D virus (HDV), also called the delta virus.",
-        "precautions": ["consult nearest hospital", "vaccination", "eat healthy", "medication"],
-        "medicines": ["pegylated interferon", "supportive care", "liver transplant", "antiviral therapy"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hepatitis E",
-        "symptoms": ["joint_pain", "vomiting", "fatigue", "high_fever", "yellowish_skin", "dark_urine", "nausea", "loss_of_appetite", "abdominal_pain", "yellowing_of_eyes", "acute_liver_failure", "coma", "stomach_bleeding"],
-        "description": "Hepatitis E is a liver disease caused by infection with a virus known as hepatitis E virus (HEV).",
-        "precautions": ["stop alcohol consumption", "rest", "consult doctor", "medication"],
-        "medicines": ["supportive care", "rest", "adequate nutrition", "ribavirin"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Alcoholic hepatitis",
-        "symptoms": ["vomiting", "yellowish_skin", "abdominal_pain", "swelling_of_stomach", "distention_of_abdomen", "history_of_alcohol_consumption", "fluid_overload"],
-        "description": "Alcoholic hepatitis is inflammation of the liver caused by drinking alcohol.",
-        "precautions": ["stop alcohol consumption", "consult doctor", "medication", "follow up"],
-        "medicines": ["corticosteroids", "pentoxifylline", "nutritional support", "liver transplant"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Tuberculosis",
-        "symptoms": ["chills", "vomiting", "fatigue", "weight_loss", "cough", "high_fever", "breathlessness", "sweating", "loss_of_appetite", "mild_fever", "yellowing_of_eyes", "swelled_lymph_nodes", "malaise", "phlegm", "chest_pain", "blood_in_sputum"],
-        "description": "Tuberculosis (TB) is a potentially serious infectious disease that mainly affects the lungs.",
-        "precautions": ["cover mouth", "consult doctor", "medication", "rest"],
-        "medicines": ["isoniazid", "rifampin", "ethambutol", "pyrazinamide"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Common Cold",
-        "symptoms": ["continuous_sneezing", "chills", "fatigue", "cough", "high_fever", "headache", "swelled_lymph_nodes", "malaise", "phlegm", "throat_irritation", "redness_of_eyes", "sinus_pressure", "runny_nose", "congestion", "chest_pain", "loss_of_smell", "muscle_pain"],
-        "description": "The common cold is a viral infectious disease of the upper respiratory tract that primarily affects the respiratory mucosa.",
-        "precautions": ["drink vitamin c rich drinks", "take vapour", "avoid cold food", "keep fever in check"],
-        "medicines": ["decongestants", "cough suppressants", "pain relievers", "antihistamines"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Pneumonia",
-        "symptoms": ["chills", "fatigue", "cough", "high_fever", "breathlessness", "sweating", "malaise", "phlegm", "chest_pain", "fast_heart_rate", "rusty_sputum"],
-        "description": "Pneumonia is an infection that inflames air sacs in one or both lungs, which may fill with fluid.",
-        "precautions": ["consult doctor", "medication", "rest", "follow up"],
-        "medicines": ["antibiotics", "cough medicine", "fever reducers", "pain relievers"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Dimorphic hemmorhoids(piles)",
-        "symptoms": ["constipation", "pain_during_bowel_movements", "pain_in_anal_region", "bloody_stool", "irritation_in_anus"],
-        "description": "Hemorrhoids are swollen veins in the lower part of the rectum and anus.",
-        "precautions": ["avoid fatty spicy food", "consume witch hazel", "warm bath with epsom salt", "consume alovera juice"],
-        "medicines": ["topical treatments", "oral pain relievers", "stool softeners", "suppositories"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Heart attack",
-        "symptoms": ["vomiting", "breathlessness", "sweating", "chest_pain"],
-        "description": "A heart attack occurs when the flow of blood to the heart is blocked.",
-        "precautions": ["call ambulance", "chew or swallow asprin", "keep calm", "seek help"],
-        "medicines": ["aspirin", "clopidogrel", "atorvastatin", "metoprolol"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Varicose veins",
-        "symptoms": ["fatigue", "cramps", "bruising", "obesity", "swollen_legs", "swollen_blood_vessels", "prominent_veins_on_calf"],
-        "description": "Varicose veins are larger, swollen blood vessels that turn and twist just under the skin of the legs.",
-        "precautions": ["lie down flat and raise the leg high", "use oinments", "use vein compression", "dont stand still for long"],
-        "medicines": ["compression stockings", "sclerotherapy", "laser treatment", "vein stripping"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hypothyroidism",
-        "symptoms": ["fatigue", "weight_gain", "cold_hands_and_feets", "mood_swings", "loss_of_balance", "dizziness", "depression", "irritability", "abnormal_menstruation"],
-        "description": "Hypothyroidism is a condition in which the thyroid gland doesn't produce enough thyroid hormone.",
-        "precautions": ["reduce stress", "exercise", "eat healthy", "get proper sleep"],
-        "medicines": ["levothyroxine", "liothyronine", "armour thyroid", "nature-throid"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hyperthyroidism",
-        "symptoms": ["fatigue", "mood_swings", "weight_loss", "restlessness", "sweating", "diarrhoea", "fast_heart_rate", "excessive_hunger", "muscle_weakness", "irritability", "abnormal_menstruation"],
-        "description": "Hyperthyroidism occurs when the thyroid gland produces too much thyroid hormone.",
-        "precautions": ["eat healthy", "massage", "use lemon balm", "take radioactive iodine treatment"],
-        "medicines": ["methimazole", "propylthiouracil", "radioactive iodine", "beta blockers"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Hypoglycemia",
-        "symptoms": ["vomiting", "fatigue", "anxiety", "sweating", "headache", "nausea", "blurred_and_distorted_vision", "excessive_hunger", "drying_and_tingling_lips", "slurred_speech"],
-        "description": "Hypoglycemia is a condition in which your blood sugar (glucose) level is lower than normal.",
-        "precautions": ["lie down on side", "check in pulse", "drink sugary drinks", "consult doctor"],
-        "medicines": ["glucose tablets", "glucagon injection", "dextrose", "sugar"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Osteoarthristis",
-        "symptoms": ["joint_pain", "neck_pain", "knee_pain", "hip_joint_pain", "swelling_joints", "painful_walking"],
-        "description": "Osteoarthritis is the most common form of arthritis, affecting millions of people worldwide.",
-        "precautions": ["acetaminophen", "use hot and cold therapy", "try acupuncture", "massage"],
-        "medicines": ["acetaminophen", "ibuprofen", "naproxen", "topical analgesics"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Arthritis",
-        "symptoms": ["muscle_weakness", "stiff_neck", "swelling_joints", "movement_stiffness", "painful_walking"],
-        "description": "Arthritis is inflammation of one or more joints, causing pain and stiffness that can worsen with age.",
-        "precautions": ["exercise", "use hot and cold therapy", "try acupuncture", "massage"],
-        "medicines": ["NSAIDs", "corticosteroids", "DMARDs", "biologics"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "(vertigo) Paroymsal  Positional Vertigo",
-        "symptoms": ["vomiting", "headache", "nausea", "spinning_movements", "loss_of_balance", "unsteadiness"],
-        "description": "Benign paroxysmal positional vertigo (BPPV) is one of the most common causes of vertigo.",
-        "precautions": ["lie down", "avoid sudden change in body", "avoid abrupt head movment", "relax"],
-        "medicines": ["meclizine", "dimenhydrinate", "prochlorperazine", "betahistine"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Acne",
-        "symptoms": ["skin_rash", "pus_filled_pimples", "blackheads", "scurring"],
-        "description": "Acne is a skin condition that occurs when your hair follicles become plugged with oil and dead skin cells.",
-        "precautions": ["bath twice", "avoid fatty spicy food", "drink plenty of water", "avoid too many products"],
-        "medicines": ["benzoyl peroxide", "retinoids", "antibiotics", "salicylic acid"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Urinary tract infection",
-        "symptoms": ["burning_micturition", "spotting_urination", "foul_smell_of_urine", "continuous_feel_of_urine"],
-        "description": "A urinary tract infection (UTI) is an infection in any part of your urinary system.",
-        "precautions": ["drink plenty of water", "increase vitamin c intake", "drink cranberry juice", "take probiotics"],
-        "medicines": ["trimethoprim-sulfamethoxazole", "nitrofurantoin", "ciprofloxacin", "fosfomycin"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Psoriasis",
-        "symptoms": ["skin_rash", "joint_pain", "skin_peeling", "silver_like_dusting", "small_dents_in_nails", "inflammatory_nails"],
-        "description": "Psoriasis is a skin disease that causes red, itchy scaly patches, most commonly on the knees, elbows, trunk and scalp.",
-        "precautions": ["wash hands with warm soapy water", "stop bleeding using pressure", "consult doctor", "salt baths"],
-        "medicines": ["topical corticosteroids", "vitamin D analogues", "retinoids", "immunosuppressants"]
-    },
-    {
-        "id": str(uuid.uuid4()),
-        "disease": "Impetigo",
-        "symptoms": ["skin_rash", "high_fever", "blister", "red_sore_around_nose", "yellow_crust_ooze"],
-        "description": "Impetigo is a common and highly contagious skin infection that mainly affects infants and children.",
-        "precautions": ["soak affected area in warm water", "use antibiotics", "remove scabs with wet compressed cloth", "consult doctor"],
-        "medicines": ["topical antibiotics", "oral antibiotics", "mupirocin", "retapamulin"]
-    }
-]
+# Metrics. With PROMETHEUS_MULTIPROC_DIR set (several workers), counters and
+# histograms are aggregated over every worker; cache and dataset gauges
+# describe the worker that serves the scrape.
+REQUEST_LATENCY = Histogram(
+    "curely_request_duration_seconds", "Request latency by route", ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS = MetricCounter("curely_requests", "Requests by route and status", ["method", "route", "status"])
+PREDICTION_SETS = Histogram(
+    "curely_prediction_sets_per_request", "Symptom sets scored per prediction request", ["endpoint"],
+    buckets=(1, 2, 5, 10, 50, 100, 500, 1000),
+)
+PREDICTIONS_RETURNED = Histogram(
+    "curely_predictions_per_request", "Predictions returned per prediction request", ["endpoint"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500, 1000),
+)
+PREDICT_STAGES = ("normalization", "candidates", "scoring", "top_k", "serialization")
+STAGE_LATENCY = Histogram(
+    "curely_predict_stage_seconds", "Time spent in each stage of a prediction call", ["stage"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0),
+)
+SCORING_JOBS = MetricCounter(
+    "curely_scoring_jobs", "Scoring calls by where they ran; rejected ones were answered with 429", ["strategy"]
+)
+COALESCED = MetricCounter(
+    "curely_coalesced", "Lookups that joined an identical computation already in flight", ["endpoint"]
+)
+# Label lookups resolved once; observing is then a lock and an add
+STAGE_METRICS = {stage: STAGE_LATENCY.labels(stage) for stage in PREDICT_STAGES}
+
+class StageTimer:
+    """Splits the time of one prediction call between stages.
+
+    lap() charges the time since the previous lap to a stage; observe()
+    reports each stage once, so a batch costs one observation per stage.
+    """
+
+    __slots__ = ("totals", "last")
+
+    def __init__(self):
+        self.totals = dict.fromkeys(PREDICT_STAGES, 0.0)
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.totals[stage] += now - self.last
+        self.last = now
+
+    def restart(self):
+        """Start the next lap now; time spent since the last lap is charged to no stage"""
+        self.last = time.perf_counter()
+
+    def observe(self):
+        for stage, seconds in self.totals.items():
+            if seconds:
+                STAGE_METRICS[stage].observe(seconds)
+
+class MetricsMiddleware:
+    """Records latency and status of every HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route on the scope; templates keep label counts bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], path).observe(time.perf_counter() - started)
+            REQUESTS.labels(scope["method"], path, str(status)).inc()
+
+class StateCollector:
+    """Cache statistics and dataset version, read from the live objects at scrape time"""
+
+    def describe(self):
+        # Nothing to check at registration; the objects read here are created later
+        return []
+
+    def collect(self):
+        caches = {"predictions": PREDICTION_CACHE.stats(), "redis": REDIS_CACHE.stats()}
+        for name, help_text in (("hits", "Cache hits"), ("misses", "Cache misses")):
+            family = CounterMetricFamily(f"curely_cache_{name}", help_text, labels=["cache"])
+            for cache, stats in caches.items():
+                family.add_metric([cache], stats[name])
+            yield family
+        ratio = GaugeMetricFamily("curely_cache_hit_ratio", "Cache hits over lookups", labels=["cache"])
+        for cache, stats in caches.items():
+            ratio.add_metric([cache], stats["hit_ratio"])
+        yield ratio
+        size = GaugeMetricFamily("curely_cache_entries", "Entries held by the in-process prediction cache")
+        size.add_metric([], caches["predictions"]["size"])
+        yield size
+        
+        snapshot = SNAPSHOT
+        dataset = GaugeMetricFamily("curely_dataset_info", "Dataset being served", labels=["version", "generation"])
+        dataset.add_metric([snapshot.version, str(snapshot.generation)], 1)
+        yield dataset
+        diseases = GaugeMetricFamily("curely_dataset_diseases", "Diseases in the served dataset")
+        diseases.add_metric([], len(snapshot.data))
+        yield diseases
+        
+        pending = GaugeMetricFamily("curely_scoring_pending", "Scoring calls queued or running off the event loop")
+        pending.add_metric([], SCORING_EXECUTOR.pending)
+        yield pending
+
+STATE_COLLECTOR = StateCollector()
+REGISTRY.register(STATE_COLLECTOR)
+
+app.add_middleware(MetricsMiddleware)
+
+# Profiling. Off unless PROFILE_SAMPLE_RATE is set (profile 1 in N requests)
+# or a request carries the admin token in X-Profile.
+PROFILE_SAMPLE_RATE = int(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_STACKS = int(os.environ.get("PROFILE_MAX_STACKS", "10000"))
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving profiled requests.
+
+    A daemon thread reads sys._current_frames() every `interval` seconds
+    while at least one profiled request is running, and sleeps otherwise, so
+    requests that are not profiled pay nothing. Samples are aggregated as
+    collapsed stacks (`outer;...;inner count`, the input of flamegraph.pl
+    and speedscope). At most `max_stacks` distinct stacks are kept; further
+    new stacks are counted under "(dropped)".
+
+    Samples cover whatever the thread runs while a profiled request is in
+    flight, including other requests interleaved on the same event loop.
+    """
+
+    MAX_DEPTH = 128
+
+    def __init__(self, interval: float = 0.005, max_stacks: int = 10000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.requests = 0
+        self._targets: Counter = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+
+    def begin(self, thread_id: int, request: bool = True):
+        """Sample thread_id until end(); request=False for work a profiled request handed to another thread"""
+        with self._lock:
+            self._targets[thread_id] += 1
+            self.requests += request
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def end(self, thread_id: int):
+        with self._lock:
+            self._targets[thread_id] -= 1
+            if self._targets[thread_id] <= 0:
+                del self._targets[thread_id]
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.MAX_DEPTH:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._targets:
+                    self._wake.wait()
+                targets = list(self._targets)
+            frames = sys._current_frames()
+            collapsed = [self._collapse(frames[thread_id]) for thread_id in targets if thread_id in frames]
+            del frames
+            with self._lock:
+                for stack in collapsed:
+                    if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                        stack = "(dropped)"
+                    self.stacks[stack] += 1
+                    self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "samples": self.samples,
+                "stacks": len(self.stacks),
+                "active": sum(self._targets.values()),
+                "interval": self.interval,
+                "sample_rate": PROFILE_SAMPLE_RATE,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.requests = 0
+
+PROFILER = SamplingProfiler(PROFILE_INTERVAL, PROFILE_MAX_STACKS)
+# Set while a profiled request runs, so work it hands to other threads is sampled too
+PROFILING = contextvars.ContextVar("profiling", default=False)
+
+def profiled(function):
+    """function, with the thread running it sampled for as long as it runs"""
+    def run(*args):
+        thread_id = threading.get_ident()
+        PROFILER.begin(thread_id, request=False)
+        try:
+            return function(*args)
+        finally:
+            PROFILER.end(thread_id)
+    return run
+
+class ProfilerMiddleware:
+    """Profiles 1 in PROFILE_SAMPLE_RATE requests, and requests sending the admin token in X-Profile"""
+
+    def __init__(self, app):
+        self.app = app
+        self.counter = itertools.count(1)
+
+    def _wants_profile(self, scope) -> bool:
+        if PROFILE_SAMPLE_RATE > 0 and next(self.counter) % PROFILE_SAMPLE_RATE == 0:
+            return True
+        if not ADMIN_TOKEN:
+            return False
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value, ADMIN_TOKEN.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        thread_id = threading.get_ident()
+        PROFILER.begin(thread_id)
+        token = PROFILING.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            PROFILING.reset(token)
+            PROFILER.end(thread_id)
+
+app.add_middleware(ProfilerMiddleware)
+
+# Medical data - comprehensive dataset based on provided structure, kept as an
+# external JSON/CSV file or a compiled catalog (see build-dataset).
+# Ids are derived from the disease name when the dataset is loaded.
+MEDICAL_DATA_PATH = os.environ.get(
+    "MEDICAL_DATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "medical_data.json")
+)
+# Synonyms of dataset symptoms, {"canonical_symptom": ["alias", ...]}; optional
+SYMPTOM_ALIASES_PATH = os.environ.get(
+    "SYMPTOM_ALIASES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symptom_aliases.json")
+)
+# Seconds between checks of the dataset file for changes; 0 disables the watcher
+DATASET_WATCH_INTERVAL = float(os.environ.get("DATASET_WATCH_INTERVAL", "0"))
+# Token expected in X-Admin-Token; admin endpoints are disabled without one
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+TOP_K_DEFAULT = 5
+TOP_K_MAX = int(os.environ.get("TOP_K_MAX", "50"))
 
 class SymptomRequest(BaseModel):
     symptoms: List[str]
+    # Number of predictions to return, and the lowest confidence worth returning
+    top_k: int = Field(TOP_K_DEFAULT, ge=1, le=TOP_K_MAX)
+    min_confidence: float = Field(0.0, ge=0, le=100)
+    # Scoring engine to rank with; the configured SCORING_ENGINE when unset
+    engine: Optional[str] = None
+
+PREDICT_BATCH_MAX = int(os.environ.get("PREDICT_BATCH_MAX", "1000"))
 
 class DiseasePrediction(BaseModel):
     id: str
@@ -364,9 +388,27 @@ class DiseasePrediction(BaseModel):
     precautions: List[str]
     medicines: List[str]
 
+SYMPTOM_PUNCTUATION = re.compile(r'[^a-zA-Z0-9\s]')
+
 def normalize_symptom(symptom: str) -> str:
     """Normalize symptom for better matching"""
-    return re.sub(r'[^a-zA-Z0-9\s]', '', symptom.lower().strip().replace('_', ' '))
+    return SYMPTOM_PUNCTUATION.sub('', symptom.lower().strip().replace('_', ' '))
+
+def confidence_from_matches(exact_count: int, partial_count: int, user_count: int) -> float:
+    """Turn exact/partial match counts into a capped confidence percentage"""
+    total_matches = exact_count + (partial_count * 0.7)  # Partial matches have 70% weight
+    
+    # Confidence based on percentage of user symptoms matched
+    confidence = (total_matches / user_count) * 100
+    
+    # Bonus for having many symptoms match
+    if total_matches >= 3:
+        confidence += 10
+    elif total_matches >= 2:
+        confidence += 5
+    
+    # Cap at 95% for realistic medical prediction
+    return min(confidence, 95.0)
 
 def calculate_confidence(user_symptoms: List[str], disease_symptoms: List[str]) -> tuple:
     """Calculate confidence score and matching symptoms"""
@@ -381,93 +423,2348 @@ def calculate_confidence(user_symptoms: List[str], disease_symptoms: List[str])
                 exact_matches.append(user_sym)
     
     # Partial matches (if symptom contains the user input or vice versa)
+    exact_set = set(exact_matches)
     partial_matches = []
     for user_sym in normalized_user:
         for disease_sym in normalized_disease:
-            if (user_sym in disease_sym or disease_sym in user_sym) and disease_sym not in exact_matches:
+            if disease_sym not in exact_set and (user_sym in disease_sym or disease_sym in user_sym):
                 partial_matches.append(disease_sym)
     
-    total_matches = len(exact_matches) + (len(partial_matches) * 0.7)  # Partial matches have 70% weight
-    
     if len(normalized_user) == 0:
         return 0.0, []
     
-    # Confidence based on percentage of user symptoms matched
-    confidence = (total_matches / len(normalized_user)) * 100
+    confidence = confidence_from_matches(len(exact_matches), len(partial_matches), len(normalized_user))
     
-    # Bonus for having many symptoms match
-    if total_matches >= 3:
-        confidence += 10
-    elif total_matches >= 2:
-        confidence += 5
+    return confidence, exact_matches + partial_matches
+
+class TrieNode:
+    __slots__ = ("children", "word", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.word: Optional[str] = None
+        self.top: List = []
+
+class PrefixTrie:
+    """Trie over weighted words that keeps the best completions of every prefix.
+
+    Completions are ranked by weight (highest first, then alphabetically) and
+    the `top` best are stored on each node at build time, so a completion is a
+    walk down the prefix. The same nodes drive bounded edit-distance lookups.
+    """
+
+    def __init__(self, weights: Dict[str, float], top: int = 50):
+        self.root = TrieNode()
+        for word, weight in weights.items():
+            node = self.root
+            node.top.append((-weight, word))
+            for char in word:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = TrieNode()
+                node = child
+                node.top.append((-weight, word))
+            node.word = word
+        
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.top = [word for _, word in sorted(node.top)[:top]]
+            stack.extend(node.children.values())
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """Best-weighted words starting with prefix"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+    def fuzzy(self, word: str, max_distance: int) -> Dict[str, int]:
+        """Words within max_distance edits (Levenshtein) of word, with their distance"""
+        found = {}
+        stack = [(child, char, list(range(len(word) + 1))) for char, child in self.root.children.items()]
+        while stack:
+            node, char, previous = stack.pop()
+            row = [previous[0] + 1]
+            for position in range(1, len(word) + 1):
+                row.append(min(
+                    row[position - 1] + 1,
+                    previous[position] + 1,
+                    previous[position - 1] + (word[position - 1] != char),
+                ))
+            if node.word is not None and row[-1] <= max_distance:
+                found[node.word] = row[-1]
+            # No completion of this prefix can get back under the bound
+            if min(row) <= max_distance:
+                stack.extend((child, next_char, row) for next_char, child in node.children.items())
+        return found
+
+SUGGEST_LIMIT_MAX = 50
+
+class PartialMatcher:
+    """Finds every vocabulary symptom that contains, or is contained in, a query.
+
+    An Aho-Corasick automaton over the vocabulary reports the symptoms occurring
+    inside the query in a single pass over its characters, and an n-gram index
+    narrows down the symptoms that contain the query to a few verified candidates.
+    Symptoms are reported by their position (term id) in the vocabulary.
+    """
+
+    NGRAM = 3
+    MEMO_MAX = 8192
+
+    def __init__(self, vocabulary: List[str]):
+        self.vocabulary = list(vocabulary)
+        # query -> related(query), kept across requests
+        self._memo: Dict[str, set] = {}
+        # Empty symptoms are substrings of everything
+        self.empty_terms = [term_id for term_id, term in enumerate(self.vocabulary) if not term]
+        self._build_automaton()
+        self._build_ngrams()
+
+    def _build_automaton(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.terms_at: List[List[int]] = [[]]
+        for term_id, term in enumerate(self.vocabulary):
+            if not term:
+                continue
+            node = 0
+            for char in term:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.terms_at.append([])
+                node = next_node
+            self.terms_at[node].append(term_id)
+        
+        # Breadth-first failure links; output_link jumps to the nearest
+        # suffix node that ends a term so matching never walks empty chains
+        self.output_link = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                failed = self.fail[child]
+                self.output_link[child] = failed if self.terms_at[failed] else self.output_link[failed]
+                queue.append(child)
+
+    def _build_ngrams(self):
+        # Every substring up to NGRAM characters, so short queries are a
+        # single lookup and longer ones intersect their n-gram postings
+        self.ngrams: Dict[str, set] = {}
+        for term_id, term in enumerate(self.vocabulary):
+            for size in range(1, self.NGRAM + 1):
+                for start in range(len(term) - size + 1):
+                    self.ngrams.setdefault(term[start:start + size], set()).add(term_id)
+
+    def contained_in(self, query: str) -> set:
+        """Ids of the vocabulary symptoms occurring inside query"""
+        found = set(self.empty_terms)
+        node = 0
+        for char in query:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            hit = node if self.terms_at[node] else self.output_link[node]
+            while hit:
+                found.update(self.terms_at[hit])
+                hit = self.output_link[hit]
+        return found
+
+    def containing(self, query: str) -> set:
+        """Ids of the vocabulary symptoms that contain query"""
+        if not query:
+            return set(range(len(self.vocabulary)))
+        if len(query) <= self.NGRAM:
+            return set(self.ngrams.get(query, ()))
+        
+        postings = []
+        for start in range(len(query) - self.NGRAM + 1):
+            term_ids = self.ngrams.get(query[start:start + self.NGRAM])
+            if not term_ids:
+                return set()
+            postings.append(term_ids)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {term_id for term_id in candidates if query in self.vocabulary[term_id]}
+
+    def related(self, query: str) -> set:
+        """Ids of the vocabulary symptoms that contain query or are contained in it"""
+        return self.contained_in(query) | self.containing(query)
+
+    def related_memo(self, query: str) -> set:
+        """related(), remembered for the next requests; the memo is emptied when full"""
+        found = self._memo.get(query)
+        if found is None:
+            found = self.related(query)
+            if len(self._memo) >= self.MEMO_MAX:
+                self._memo.clear()
+            self._memo[query] = found
+        return found
+
+    def partial_matches(self, normalized_user: List[str]) -> List[List[int]]:
+        """Partial-match term ids for each user symptom of a request.
+
+        Symptoms equal to any user symptom are exact matches for every disease
+        listing them, so they are left out. Symptoms are only scanned for the
+        first time they are seen; later requests reuse the memoized matches.
+        """
+        user_set = set(normalized_user)
+        partial: Dict[str, List[int]] = {}
+        for user_sym in user_set:
+            partial[user_sym] = [term_id for term_id in self.related_memo(user_sym) if self.vocabulary[term_id] not in user_set]
+        return [partial[user_sym] for user_sym in normalized_user]
+
+class SymptomIndex:
+    """Inverted index from normalized symptom to the diseases that list it.
+
+    Built once from a disease catalog so a prediction only visits diseases
+    sharing at least one (exact or partial) symptom with the request, while
+    reproducing calculate_confidence match for match. Every normalized
+    symptom is interned once as a term id: diseases hold arrays of term ids
+    and the postings are flat arrays of disease indices, so scoring counts
+    integers and symptom strings are only looked up for the final results.
+    """
+
+    def __init__(self, catalog: Sequence):
+        # term id -> normalized symptom, and back
+        self.vocabulary: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        # term id -> first spelling of it in the dataset
+        self.spellings: List[str] = []
+        # Term ids of each disease's symptoms, in dataset order
+        self.disease_terms: List[array] = []
+        postings: List[array] = []
+        # Each catalog symptom is normalized once, however many diseases list it
+        terms_of_symptom: Dict[int, int] = {}
+        for disease_idx in range(len(catalog)):
+            terms = array("I")
+            for symptom_id in catalog.symptom_ids(disease_idx):
+                term_id = terms_of_symptom.get(symptom_id)
+                if term_id is None:
+                    spelling = catalog.symptom(symptom_id)
+                    term = normalize_symptom(spelling)
+                    term_id = self.term_ids.get(term)
+                    if term_id is None:
+                        term_id = self.term_ids[term] = len(self.vocabulary)
+                        self.vocabulary.append(term)
+                        self.spellings.append(spelling)
+                        postings.append(array("I"))
+                    terms_of_symptom[symptom_id] = term_id
+                terms.append(term_id)
+                postings[term_id].append(disease_idx)
+            self.disease_terms.append(terms)
+        
+        # Postings in compressed form: the diseases listing term t (once per
+        # listing) are posting_diseases[indptr[t]:indptr[t + 1]]
+        self.indptr = array("I", [0])
+        self.posting_diseases = array("I")
+        for term_postings in postings:
+            self.posting_diseases.extend(term_postings)
+            self.indptr.append(len(self.posting_diseases))
+        self._postings = memoryview(self.posting_diseases)
+        self.matcher = PartialMatcher(self.vocabulary)
+        
+        # Symptom completions ranked by how many diseases list the symptom
+        self.disease_counts = [len(set(term_postings)) for term_postings in postings]
+        self.completions = PrefixTrie(dict(zip(self.vocabulary, self.disease_counts)), SUGGEST_LIMIT_MAX)
+
+    def diseases(self, term_id: int) -> memoryview:
+        """Indices of the diseases listing a term, repeated if listed twice"""
+        return self._postings[self.indptr[term_id]:self.indptr[term_id + 1]]
+
+    def counts(self, normalized_user: List[str], related: List[List[int]]) -> tuple:
+        """Exact and partial match counts of every candidate disease, as two Counters"""
+        exact = Counter()
+        for user_sym in normalized_user:
+            term_id = self.term_ids.get(user_sym)
+            if term_id is not None:
+                exact.update(self.diseases(term_id))
+        partial = Counter()
+        for user_related in related:
+            for term_id in user_related:
+                partial.update(self.diseases(term_id))
+        return exact, partial
+
+    def matching_symptoms(self, normalized_user: List[str], related: List[List[int]], disease_idx: int) -> List[str]:
+        """Exact then partial matches of a single disease, given the request's partial-match sets"""
+        terms = self.disease_terms[disease_idx]
+        matching = []
+        for user_sym in normalized_user:
+            term_id = self.term_ids.get(user_sym)
+            if term_id is not None:
+                matching.extend([user_sym] * terms.count(term_id))
+        for user_related in related:
+            user_related = set(user_related)
+            matching.extend(self.vocabulary[term_id] for term_id in terms if term_id in user_related)
+        return matching
+
+class SymptomCanonicalizer:
+    """Maps free-text symptoms to the canonical symptom names of a dataset.
+
+    Input is normalized, then looked up in an alias table of synonyms
+    ("temperature" -> "high fever"), so synonyms land on the dataset's own
+    symptom and match it exactly by term id instead of through substring
+    matching. Results are memoized per raw input: the dataset's spellings
+    and aliases permanently, user input in a memo emptied when full.
+    Aliases that are themselves dataset symptoms, or that point outside the
+    dataset, are ignored.
+    """
+
+    MEMO_MAX = 65536
+
+    def __init__(self, index: SymptomIndex, aliases: Dict[str, List[str]] = None):
+        self.aliases: Dict[str, str] = {}
+        ignored = []
+        for canonical, synonyms in (aliases or {}).items():
+            target = normalize_symptom(canonical)
+            for synonym in synonyms:
+                alias = normalize_symptom(synonym)
+                if target in index.term_ids and alias not in index.term_ids:
+                    self.aliases[alias] = target
+                else:
+                    ignored.append(synonym)
+        if ignored:
+            logger.warning("Ignoring %d symptom aliases that collide with or miss the dataset: %s", len(ignored), ignored[:10])
+        self.known: Dict[str, str] = dict(zip(index.spellings, index.vocabulary))
+        self.known.update(self.aliases)
+        self.memo: Dict[str, str] = {}
+
+    def canonical(self, symptom: str) -> str:
+        term = self.known.get(symptom)
+        if term is None:
+            term = self.memo.get(symptom)
+            if term is None:
+                term = normalize_symptom(symptom)
+                term = self.aliases.get(term, term)
+                if len(self.memo) >= self.MEMO_MAX:
+                    self.memo.clear()
+                self.memo[symptom] = term
+        return term
+
+    def canonical_symptoms(self, symptoms: List[str]) -> tuple:
+        """Canonical, deduplicated and sorted symptoms; predictions are scored and cached on this form"""
+        return tuple(sorted({self.canonical(symptom) for symptom in symptoms}))
+
+def read_symptom_aliases(path: str) -> Dict[str, List[str]]:
+    """Alias table at path, or no aliases when there is no file"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+class ScoringEngine(ABC):
+    """Ranks diseases for a request; subclasses decide how scores are computed"""
+
+    name = ""
+
+    def __init__(self, index: SymptomIndex):
+        self.index = index
+
+    def rank(self, normalized_user: List[str], limit: int, min_confidence: float = 0.0) -> List[tuple]:
+        """Top `limit` (disease index, rounded confidence, matching symptoms), best first.
+
+        Diseases whose rounded confidence is below min_confidence are left
+        out. Ties on the rounded confidence keep dataset order.
+        """
+        return self.rank_batch([normalized_user], limit, min_confidence)[0]
+
+    @abstractmethod
+    def rank_batch(self, batch: List[List[str]], limit: int, min_confidence: float = 0.0) -> List[List[tuple]]:
+        """rank() for several requests, sharing the per-symptom work between them"""
+
+class PythonScoringEngine(ScoringEngine):
+    """Scores every candidate disease from the inverted index in pure Python"""
+
+    name = "python"
+
+    def rank_batch(self, batch: List[List[str]], limit: int, min_confidence: float = 0.0) -> List[List[tuple]]:
+        timer = StageTimer()
+        ranked = [
+            self._rank(normalized_user, self.index.matcher.partial_matches(normalized_user), limit, min_confidence, timer)
+            for normalized_user in batch
+        ]
+        timer.observe()
+        return ranked
+
+    def _rank(self, normalized_user: List[str], related: List[List[int]], limit: int, min_confidence: float, timer: StageTimer) -> List[tuple]:
+        exact, partial = self.index.counts(normalized_user, related)
+        timer.lap("candidates")
+        user_count = len(normalized_user)
+        scored = []
+        for disease_idx in exact.keys() | partial.keys():
+            confidence = round(confidence_from_matches(exact[disease_idx], partial[disease_idx], user_count), 1)
+            if confidence > 0 and confidence >= min_confidence:  # Only include diseases with some match
+                scored.append((-confidence, disease_idx))
+        timer.lap("scoring")
+        
+        # Bounded heap over the raw scores; matching symptoms are only
+        # spelled out for the diseases returned
+        ranked = [
+            (disease_idx, -confidence, self.index.matching_symptoms(normalized_user, related, disease_idx))
+            for confidence, disease_idx in heapq.nsmallest(limit, scored)
+        ]
+        timer.lap("top_k")
+        return ranked
+
+class NumpyScoringEngine(ScoringEngine):
+    """Scores the whole catalog as sparse matrix-vector products.
+
+    The disease x symptom incidence matrix is the index's compressed postings
+    (one slice of disease indices per term), so exact and partial match counts
+    for every disease come out of two weighted bincounts. Batches are scored
+    as one sparse matrix-matrix product per chunk.
+    """
+
+    name = "numpy"
+    BATCH_CELLS = 1 << 22
+
+    def __init__(self, index: SymptomIndex):
+        super().__init__(index)
+        self.disease_count = len(index.disease_terms)
+        self.indptr = np.frombuffer(index.indptr, dtype=np.uint32).astype(np.int64)
+        self.indices = np.frombuffer(index.posting_diseases, dtype=np.uint32).astype(np.int64)
+
+    def _matmat(self, weights: List[Counter]) -> np.ndarray:
+        """Incidence matrix times one sparse term weight vector per row"""
+        term_ids, columns, values = [], [], []
+        for column, row_weights in enumerate(weights):
+            for term_id, weight in row_weights.items():
+                term_ids.append(term_id)
+                columns.append(column)
+                values.append(weight)
+        if not term_ids:
+            return np.zeros((len(weights), self.disease_count))
+        
+        term_ids = np.array(term_ids, dtype=np.int64)
+        starts, ends = self.indptr[term_ids], self.indptr[term_ids + 1]
+        lengths = ends - starts
+        rows = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        cells = np.repeat(np.array(columns, dtype=np.int64) * self.disease_count, lengths) + rows
+        cell_weights = np.repeat(np.array(values, dtype=np.float64), lengths)
+        flat = np.bincount(cells, weights=cell_weights, minlength=len(weights) * self.disease_count)
+        return flat.reshape(len(weights), self.disease_count)
+
+    def scores(self, batch: List[List[str]], related: List[List[List[int]]]) -> tuple:
+        """Raw confidence and total match weight of every disease, one row per request"""
+        term_ids = self.index.term_ids
+        exact = self._matmat([
+            Counter(term_ids[user_sym] for user_sym in normalized_user if user_sym in term_ids)
+            for normalized_user in batch
+        ])
+        partial = self._matmat([
+            Counter(term_id for user_related in request_related for term_id in user_related)
+            for request_related in related
+        ])
+        user_counts = np.array([len(normalized_user) for normalized_user in batch], dtype=np.float64)[:, None]
+        
+        # Same arithmetic, in the same order, as confidence_from_matches
+        total_matches = exact + (partial * 0.7)
+        confidence = (total_matches / user_counts) * 100
+        confidence = np.where(total_matches >= 3, confidence + 10, np.where(total_matches >= 2, confidence + 5, confidence))
+        return np.minimum(confidence, 95.0), total_matches
+
+    def rank_batch(self, batch: List[List[str]], limit: int, min_confidence: float = 0.0) -> List[List[tuple]]:
+        timer = StageTimer()
+        related = [self.index.matcher.partial_matches(normalized_user) for normalized_user in batch]
+        timer.lap("candidates")
+        results = []
+        # Score at most BATCH_CELLS (request, disease) pairs per matrix product
+        chunk = max(1, self.BATCH_CELLS // max(self.disease_count, 1))
+        for start in range(0, len(batch), chunk):
+            confidence, total_matches = self.scores(batch[start:start + chunk], related[start:start + chunk])
+            timer.lap("scoring")
+            for row, request_idx in enumerate(range(start, min(start + chunk, len(batch)))):
+                results.append([
+                    (disease_idx, rounded, self.index.matching_symptoms(batch[request_idx], related[request_idx], disease_idx))
+                    for rounded, disease_idx in self._top(confidence[row], total_matches[row], limit, min_confidence)
+                ])
+            timer.lap("top_k")
+        timer.observe()
+        return results
+
+    @staticmethod
+    def _top(confidence: np.ndarray, total_matches: np.ndarray, limit: int, min_confidence: float) -> List[tuple]:
+        """(rounded confidence, disease index) of the best `limit` matching diseases"""
+        # Margin for rounding; the exact cut is made on the rounded scores
+        candidates = np.flatnonzero((total_matches > 0) & (confidence >= min_confidence - 0.1))
+        
+        if len(candidates) > limit:
+            # Rounding to one decimal can reorder scores within 0.05 of the
+            # k-th best, so keep everything close to it and settle exactly below
+            candidate_scores = confidence[candidates]
+            top = np.argpartition(candidate_scores, len(candidates) - limit)[len(candidates) - limit:]
+            threshold = candidate_scores[top].min() - 0.1
+            candidates = candidates[candidate_scores >= threshold]
+        
+        ranked = [(round(float(confidence[disease_idx]), 1), int(disease_idx)) for disease_idx in candidates]
+        ranked = [(rounded, disease_idx) for rounded, disease_idx in ranked if rounded >= min_confidence]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked[:limit]
+
+class IdfScoringEngine(ScoringEngine):
+    """Ranks by TF-IDF cosine similarity instead of the match-count heuristic.
+
+    Each symptom is weighted by its inverse disease frequency, so a symptom
+    listed by few diseases ("yellow crust ooze") outweighs one listed by many
+    ("fatigue"). Weights and disease vector norms are computed once per
+    dataset; a request is a sparse dot product over the postings of its
+    symptoms. A partial match counts 0.7 of the weaker of the two symptom
+    weights, once per (user symptom, disease). Confidence is the cosine
+    similarity in percent, capped at 95 like the heuristic.
+    """
+
+    name = "idf"
+    PARTIAL_WEIGHT = 0.7
+
+    def __init__(self, index: SymptomIndex):
+        super().__init__(index)
+        disease_count = len(index.disease_terms)
+        self.idf = [
+            math.log((disease_count + 1) / (document_count + 1)) + 1 for document_count in index.disease_counts
+        ]
+        # Weight of symptoms no disease lists; they still count against every disease
+        self.unknown_idf = math.log(disease_count + 1) + 1
+        self.disease_norms = [
+            math.sqrt(sum(self.idf[term_id] ** 2 for term_id in set(terms))) for terms in index.disease_terms
+        ]
+
+    def rank_batch(self, batch: List[List[str]], limit: int, min_confidence: float = 0.0) -> List[List[tuple]]:
+        timer = StageTimer()
+        ranked = [
+            self._rank(normalized_user, self.index.matcher.partial_matches(normalized_user), limit, min_confidence, timer)
+            for normalized_user in batch
+        ]
+        timer.observe()
+        return ranked
+
+    def _rank(self, normalized_user: List[str], related: List[List[int]], limit: int, min_confidence: float, timer: StageTimer) -> List[tuple]:
+        index, idf = self.index, self.idf
+        dot: Dict[int, float] = {}
+        user_norm = 0.0
+        for user_sym, user_related in zip(normalized_user, related):
+            term_id = index.term_ids.get(user_sym)
+            weight = self.unknown_idf if term_id is None else idf[term_id]
+            user_norm += weight * weight
+            if term_id is not None:
+                for disease_idx in set(index.diseases(term_id)):
+                    dot[disease_idx] = dot.get(disease_idx, 0.0) + weight * weight
+            # Best partial match of this user symptom in each disease
+            partial: Dict[int, float] = {}
+            for related_id in user_related:
+                related_weight = min(weight, idf[related_id])
+                for disease_idx in index.diseases(related_id):
+                    if related_weight > partial.get(disease_idx, 0.0):
+                        partial[disease_idx] = related_weight
+            for disease_idx, related_weight in partial.items():
+                dot[disease_idx] = dot.get(disease_idx, 0.0) + self.PARTIAL_WEIGHT * weight * related_weight
+        timer.lap("candidates")
+        
+        user_norm = math.sqrt(user_norm)
+        scored = []
+        for disease_idx, value in dot.items():
+            confidence = round(min(value / (user_norm * self.disease_norms[disease_idx]) * 100, 95.0), 1)
+            if confidence > 0 and confidence >= min_confidence:
+                scored.append((-confidence, disease_idx))
+        timer.lap("scoring")
+        
+        ranked = [
+            (disease_idx, -confidence, index.matching_symptoms(normalized_user, related, disease_idx))
+            for confidence, disease_idx in heapq.nsmallest(limit, scored)
+        ]
+        timer.lap("top_k")
+        return ranked
+
+SCORING_ENGINES = {
+    "python": PythonScoringEngine,
+    "numpy": NumpyScoringEngine,
+    "idf": IdfScoringEngine,
+}
+
+def create_scoring_engine(name: str, index: SymptomIndex) -> ScoringEngine:
+    """Instantiate the scoring engine configured by name"""
+    try:
+        return SCORING_ENGINES[name](index)
+    except KeyError:
+        raise ValueError(f"Unknown scoring engine {name!r}, expected one of {sorted(SCORING_ENGINES)}") from None
+
+class TTLCache:
+    """Bounded in-process cache whose entries also expire after `ttl` seconds.
+
+    With the "lru" policy a hit refreshes the entry's position, with "fifo"
+    entries are evicted strictly in insertion order. A maxsize of 0 disables
+    caching.
+    """
+
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, maxsize: int, ttl: float, policy: str = "lru", timer=time.monotonic):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown cache policy {policy!r}, expected one of {self.POLICIES}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.timer():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            if self.policy == "lru":
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Top predictions keyed on prediction_query()
+PREDICTION_CACHE = TTLCache(
+    maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", "300")),
+    policy=os.environ.get("PREDICTION_CACHE_POLICY", "lru"),
+)
+
+class RedisCache:
+    """Shared second-tier cache for multi-worker deployments.
+
+    Values are stored as JSON under `{prefix}:{version}:{namespace}:{digest}`,
+    where `version` is the dataset version the caller computed against, so a
+    new dataset never reads entries computed from an old one. Without a
+    client every lookup misses; a Redis error disables the cache for
+    `retry_after` seconds so requests fall back to computing instead of
+    waiting on Redis.
+    """
+
+    def __init__(self, client=None, ttl: int = 3600, prefix: str = "curely", retry_after: float = 30.0):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._down_until = 0.0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        if not url:
+            return cls(**kwargs)
+        if aioredis is None:
+            logger.warning("REDIS_URL is set but the redis package is not installed; shared cache disabled")
+            return cls(**kwargs)
+        client = aioredis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1)
+        return cls(client, **kwargs)
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._down_until
+
+    def _key(self, version: str, namespace: str, key) -> str:
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return f"{self.prefix}:{version}:{namespace}:{digest}"
+
+    def _failed(self, error: Exception):
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_after
+        logger.warning("Redis cache unavailable for %ss: %s", self.retry_after, error)
+
+    async def get_many(self, version: str, namespace: str, keys: List) -> List:
+        """Cached values for keys, None for every miss"""
+        if not keys or not self.available:
+            return [None] * len(keys)
+        try:
+            raw = await self.client.mget([self._key(version, namespace, key) for key in keys])
+        except (aioredis.RedisError, OSError) as error:
+            self._failed(error)
+            return [None] * len(keys)
+        
+        values = [None if value is None else json.loads(value) for value in raw]
+        found = sum(value is not None for value in values)
+        self.hits += found
+        self.misses += len(values) - found
+        return values
+
+    async def get(self, version: str, namespace: str, key):
+        return (await self.get_many(version, namespace, [key]))[0]
+
+    async def set_many(self, version: str, namespace: str, items: Dict, ttl: int = None):
+        if not items or not self.available:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self._key(version, namespace, key), json.dumps(value), ex=ttl or self.ttl)
+                await pipe.execute()
+        except (aioredis.RedisError, OSError) as error:
+            self._failed(error)
+
+    async def set(self, version: str, namespace: str, key, value, ttl: int = None):
+        await self.set_many(version, namespace, {key: value}, ttl)
+
+    async def delete(self, version: str, namespace: str, key):
+        if not self.available:
+            return
+        try:
+            await self.client.delete(self._key(version, namespace, key))
+        except (aioredis.RedisError, OSError) as error:
+            self._failed(error)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.client is not None,
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+REDIS_CACHE = RedisCache.from_url(
+    os.environ.get("REDIS_URL", ""),
+    ttl=int(os.environ.get("REDIS_CACHE_TTL", "3600")),
+    prefix=os.environ.get("REDIS_KEY_PREFIX", "curely"),
+)
+
+class SingleFlight:
+    """Coalesces concurrent computations of the same keys.
+
+    A key that is already being computed is awaited instead of computed
+    again, so a burst of identical requests costs one computation. The
+    computation runs as its own task: a caller that goes away does not
+    cancel it for the others waiting on it. Nothing is kept once it is
+    done; caching finished results is left to the caches.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # key -> (task computing it, position of its result)
+        self._calls: Dict[Any, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do_many(self, keys: List, compute) -> List:
+        """Result of each key; compute(keys) returns the results of the keys not in flight, in order"""
+        fresh = [key for key in keys if key not in self._calls]
+        if len(fresh) < len(keys):
+            COALESCED.labels(self.name).inc(len(keys) - len(fresh))
+        if fresh:
+            task = asyncio.ensure_future(compute(fresh))
+            for position, key in enumerate(fresh):
+                self._calls[key] = (task, position)
+            task.add_done_callback(lambda done: self._forget(fresh, done))
+        calls = [self._calls[key] for key in keys]
+        
+        for task in {id(task): task for task, _ in calls}.values():
+            await asyncio.shield(task)
+        return [task.result()[position] for task, position in calls]
+
+    async def do(self, key, compute):
+        """Result of compute() for key, shared with concurrent callers of the same key"""
+        async def compute_one(keys):
+            return [await compute()]
+        return (await self.do_many([key], compute_one))[0]
+
+    def _forget(self, keys: List, task: asyncio.Future):
+        for key in keys:
+            if self._calls.get(key, (None,))[0] is task:
+                del self._calls[key]
+        # Retrieve the outcome so a failure nobody waited for is not logged as lost
+        if not task.cancelled():
+            task.exception()
+
+PREDICT_FLIGHTS = SingleFlight("predict")
+SEARCH_FLIGHTS = SingleFlight("search")
+
+# uuid5 namespace of disease ids; changing it changes every id
+DISEASE_ID_NAMESPACE = uuid.UUID("a0834cd1-a8a0-44c7-8469-d70a664706bf")
+
+def disease_id(name: str) -> str:
+    """Stable id of a disease, identical across workers and restarts"""
+    return str(uuid.uuid5(DISEASE_ID_NAMESPACE, name))
+
+def assign_disease_ids(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of the records with an "id" first, derived from the name unless already set"""
+    records = []
+    seen = set()
+    for disease in data:
+        record = {"id": disease.get("id") or disease_id(disease["disease"]), **disease}
+        if record["id"] in seen:
+            raise ValueError(f"Duplicate disease id {record['id']} ({disease['disease']!r})")
+        seen.add(record["id"])
+        records.append(record)
+    return records
+
+def dataset_version(data: List[Dict[str, Any]]) -> str:
+    """Content hash identifying a dataset across workers and restarts"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a text"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+class DiseaseSearchIndex:
+    """Full-text index over disease names, descriptions and symptoms.
+
+    Documents are ranked with BM25F: per-field term frequencies are weighted
+    and length-normalized, and the saturated term weight of every
+    (term, disease) pair is precomputed at build time. Every query token must
+    match each result, either exactly or, when it has no exact match, within a
+    small edit distance. The last token is also matched as a prefix of indexed
+    terms, since it is usually still being typed.
+    """
+
+    FIELD_WEIGHTS = {"disease": 3.0, "symptoms": 1.5, "description": 1.0}
+    K1 = 1.2
+    B = 0.75
+    PREFIX_EXPANSIONS = 50
+    PREFIX_FACTOR = 0.8
+    FUZZY_FACTORS = {1: 0.6, 2: 0.4}
+
+    def __init__(self, diseases: List[Dict[str, Any]]):
+        fields = [
+            {
+                "disease": tokenize(disease["disease"]),
+                "symptoms": tokenize(" ".join(disease["symptoms"])),
+                "description": tokenize(disease.get("description", "")),
+            }
+            for disease in diseases
+        ]
+        average_length = {
+            field: (sum(len(doc[field]) for doc in fields) / len(fields) if fields else 0) or 1
+            for field in self.FIELD_WEIGHTS
+        }
+        
+        # term -> {disease index: saturated BM25F term weight}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        for disease_idx, doc in enumerate(fields):
+            weighted_tf: Dict[str, float] = {}
+            for field, weight in self.FIELD_WEIGHTS.items():
+                norm = 1 - self.B + self.B * len(doc[field]) / average_length[field]
+                for term, count in Counter(doc[field]).items():
+                    weighted_tf[term] = weighted_tf.get(term, 0.0) + weight * count / norm
+            for term, tf in weighted_tf.items():
+                self.postings.setdefault(term, {})[disease_idx] = tf * (self.K1 + 1) / (tf + self.K1)
+        
+        size = len(diseases)
+        self.idf = {
+            term: math.log(1 + (size - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self.trie = PrefixTrie({term: len(docs) for term, docs in self.postings.items()}, self.PREFIX_EXPANSIONS)
+
+    def expand(self, token: str, prefix: bool) -> Dict[str, float]:
+        """Indexed terms a query token matches, with the factor applied to their score"""
+        terms = {}
+        if token in self.postings:
+            terms[token] = 1.0
+        if prefix:
+            for term in self.trie.complete(token, self.PREFIX_EXPANSIONS):
+                terms.setdefault(term, self.PREFIX_FACTOR)
+        if not terms:
+            max_distance = 0 if len(token) < 4 else 1 if len(token) < 8 else 2
+            if max_distance:
+                for term, distance in self.trie.fuzzy(token, max_distance).items():
+                    terms[term] = self.FUZZY_FACTORS[distance]
+        return terms
+
+    def search(self, query: str) -> List[int]:
+        """Indices of matching diseases, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        scores: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            # Single characters only expand when they are the whole query
+            prefix = position == len(tokens) - 1 and (len(token) > 1 or len(tokens) == 1)
+            token_scores: Dict[int, float] = {}
+            for term, factor in self.expand(token, prefix).items():
+                idf = self.idf[term]
+                for disease_idx, weight in self.postings[term].items():
+                    # A token counts once, through its best-scoring expansion
+                    score = idf * weight * factor
+                    if score > token_scores.get(disease_idx, 0.0):
+                        token_scores[disease_idx] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {disease_idx: scores[disease_idx] + score for disease_idx, score in token_scores.items() if disease_idx in scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return sorted(scores, key=lambda disease_idx: (-scores[disease_idx], disease_idx))
+
+def dumps_json(value) -> bytes:
+    """Compact UTF-8 JSON, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings an Accept-Encoding header allows (q > 0)"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class PreparedResponse:
+    """A JSON payload serialized and compressed once, then served as raw bytes.
+
+    Each representation (identity, gzip and, when available, br) has its own
+    strong ETag, and a matching If-None-Match is answered with 304.
+    """
+
+    def __init__(self, value):
+        body = dumps_json(value)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.representations = {"identity": (body, f'"{digest}"')}
+        self.representations["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            self.representations["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        self.etags = {etag: coding for coding, (_, etag) in self.representations.items()}
+
+    def _not_modified(self, if_none_match: str):
+        """Coding of the representation whose ETag the client already holds"""
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return "identity"
+            # If-None-Match uses weak comparison
+            coding = self.etags.get(tag[2:] if tag.startswith("W/") else tag)
+            if coding is not None:
+                return coding
+        return None
+
+    def response(self, request: Request) -> Response:
+        headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        
+        cached = self._not_modified(request.headers.get("if-none-match", ""))
+        if cached is not None:
+            headers["ETag"] = self.representations[cached][1]
+            return Response(status_code=304, headers=headers)
+        
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        coding = next((coding for coding in ("br", "gzip") if coding in accepted and coding in self.representations), "identity")
+        body, headers["ETag"] = self.representations[coding]
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+DISEASE_FIELDS = ("id", "disease", "symptoms", "description", "precautions", "medicines")
+LIST_FIELDS = ("symptoms", "precautions", "medicines")
+
+class CompiledCatalog(Sequence):
+    """Read-only disease catalog memory-mapped from a compiled dataset file.
+
+    All strings are interned once in a string table and symptoms are stored
+    as arrays of symptom ids, so the file is mapped as is and shared between
+    every worker through the page cache; records are only decoded into dicts
+    when they are accessed. Layout (little-endian, sections 8-byte aligned,
+    arrays are read in place so only little-endian hosts are supported):
+
+        header    MAGIC, format, disease/string/symptom counts, dataset version
+        sections  (offset, length) of each section below, in order
+        string_offsets   u64[string_count + 1] into string_data
+        string_data      UTF-8 bytes
+        scalars          u32[disease_count * 3] string ids of id, disease, description
+        symptom_strings  u32[symptom_count] string id of each interned symptom
+        symptoms         u32[disease_count + 1] offsets, then u32 symptom ids
+        precautions      u32[disease_count + 1] offsets, then u32 string ids
+        medicines        u32[disease_count + 1] offsets, then u32 string ids
+    """
+
+    MAGIC = b"CURELYDS"
+    FORMAT = 1
+    HEADER = struct.Struct("<8sIIII16s")
+    SECTIONS = (
+        "string_offsets", "string_data", "scalars", "symptom_strings",
+        "symptoms_offsets", "symptoms_ids", "precautions_offsets", "precautions_ids",
+        "medicines_offsets", "medicines_ids",
+    )
+    SECTION = struct.Struct("<QQ")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if len(view) < self.HEADER.size + self.SECTION.size * len(self.SECTIONS):
+            raise ValueError(f"{path} is truncated or corrupt")
+        magic, file_format, self.disease_count, string_count, symptom_count, version = self.HEADER.unpack_from(view)
+        if magic != self.MAGIC or file_format != self.FORMAT:
+            raise ValueError(f"{path} is not a compiled dataset (format {self.FORMAT})")
+        if sys.byteorder != "little":
+            raise ValueError("Compiled datasets can only be mapped on little-endian hosts")
+        self.version = version.decode("ascii")
+        
+        sections = {}
+        position = self.HEADER.size
+        for name in self.SECTIONS:
+            offset, length = self.SECTION.unpack_from(view, position)
+            position += self.SECTION.size
+            if offset + length > len(view):
+                raise ValueError(f"{path} is truncated or corrupt")
+            sections[name] = view[offset:offset + length]
+        try:
+            self._string_offsets = sections["string_offsets"].cast("Q")
+            self._string_data = sections["string_data"]
+            self._scalars = sections["scalars"].cast("I")
+            self._symptom_strings = sections["symptom_strings"].cast("I")
+            self._lists = {
+                field: (sections[f"{field}_offsets"].cast("I"), sections[f"{field}_ids"].cast("I"))
+                for field in LIST_FIELDS
+            }
+        except TypeError:
+            # A section length that is not a multiple of its item size
+            raise ValueError(f"{path} is truncated or corrupt") from None
+        if (
+            len(self._symptom_strings) != symptom_count
+            or len(self._string_offsets) != string_count + 1
+            or self._string_offsets[-1] != len(self._string_data)
+            or len(self._scalars) != 3 * self.disease_count
+            or any(
+                len(offsets) != self.disease_count + 1 or offsets[-1] != len(ids)
+                for offsets, ids in self._lists.values()
+            )
+        ):
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def __len__(self) -> int:
+        return self.disease_count
+
+    def string(self, string_id: int) -> str:
+        return str(self._string_data[self._string_offsets[string_id]:self._string_offsets[string_id + 1]], "utf-8")
+
+    def _list_ids(self, field: str, disease_idx: int) -> memoryview:
+        offsets, ids = self._lists[field]
+        return ids[offsets[disease_idx]:offsets[disease_idx + 1]]
+
+    def symptom_ids(self, disease_idx: int) -> memoryview:
+        """Interned symptom ids of a disease, without decoding the record"""
+        return self._list_ids("symptoms", disease_idx)
+
+    def symptom(self, symptom_id: int) -> str:
+        return self.string(self._symptom_strings[symptom_id])
+
+    def disease_ids(self) -> List[str]:
+        """Id of every disease, in order, without decoding the records"""
+        return [self.string(string_id) for string_id in self._scalars[0::3]]
+
+    def __getitem__(self, disease_idx):
+        if isinstance(disease_idx, slice):
+            return [self[position] for position in range(*disease_idx.indices(self.disease_count))]
+        if disease_idx < 0:
+            disease_idx += self.disease_count
+        if not 0 <= disease_idx < self.disease_count:
+            raise IndexError("disease index out of range")
+        
+        id_string, name_string, description_string = self._scalars[disease_idx * 3:disease_idx * 3 + 3]
+        return {
+            "id": self.string(id_string),
+            "disease": self.string(name_string),
+            "symptoms": [self.symptom(symptom_id) for symptom_id in self.symptom_ids(disease_idx)],
+            "description": self.string(description_string),
+            "precautions": [self.string(string_id) for string_id in self._list_ids("precautions", disease_idx)],
+            "medicines": [self.string(string_id) for string_id in self._list_ids("medicines", disease_idx)],
+        }
+
+    @classmethod
+    def write(cls, data: List[Dict[str, Any]], path: str):
+        """Compile records (with ids assigned) into a catalog file at path"""
+        strings: Dict[str, int] = {}
+        symptoms: Dict[str, int] = {}
+        
+        def intern(value: str) -> int:
+            if value not in strings:
+                strings[value] = len(strings)
+            return strings[value]
+        
+        def intern_symptom(value: str) -> int:
+            if value not in symptoms:
+                symptoms[value] = len(symptoms)
+                intern(value)
+            return symptoms[value]
+        
+        scalars = []
+        lists = {field: ([0], []) for field in LIST_FIELDS}
+        for disease in data:
+            scalars.extend(intern(disease[field]) for field in ("id", "disease", "description"))
+            for field in LIST_FIELDS:
+                offsets, ids = lists[field]
+                ids.extend((intern_symptom if field == "symptoms" else intern)(value) for value in disease[field])
+                offsets.append(len(ids))
+        
+        def pack(typecode: str, values) -> bytes:
+            packed = array(typecode, values)
+            if sys.byteorder != "little":
+                packed.byteswap()
+            return packed.tobytes()
+        
+        encoded = [value.encode("utf-8") for value in strings]
+        string_offsets = [0]
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+        sections = [
+            pack("Q", string_offsets),
+            b"".join(encoded),
+            pack("I", scalars),
+            pack("I", (strings[symptom] for symptom in symptoms)),
+        ]
+        for field in LIST_FIELDS:
+            offsets, ids = lists[field]
+            sections.extend((pack("I", offsets), pack("I", ids)))
+        
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.FORMAT, len(data), len(strings), len(symptoms), dataset_version(data).encode("ascii")
+        )
+        position = len(header) + cls.SECTION.size * len(sections)
+        offsets = []
+        for section in sections:
+            position += -position % 8
+            offsets.append(position)
+            position += len(section)
+        
+        # Written beside the target and renamed, so readers never map a partial file
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(header)
+            for offset, section in zip(offsets, sections):
+                handle.write(cls.SECTION.pack(offset, len(section)))
+            for offset, section in zip(offsets, sections):
+                handle.write(b"\0" * (offset - handle.tell()))
+                handle.write(section)
+        os.replace(temporary, path)
+
+class DiseaseRecord:
+    """A disease of an InternedCatalog; its strings are shared with every other record"""
+
+    __slots__ = ("id", "disease", "description", "symptom_ids", "precautions", "medicines")
+
+    def __init__(self, id: str, disease: str, description: str, symptom_ids: array, precautions: tuple, medicines: tuple):
+        self.id = id
+        self.disease = disease
+        self.description = description
+        self.symptom_ids = symptom_ids
+        self.precautions = precautions
+        self.medicines = medicines
+
+class InternedCatalog(Sequence):
+    """In-memory disease catalog with every repeated string stored once.
+
+    The in-memory counterpart of CompiledCatalog, for JSON and CSV datasets:
+    symptoms are interned in a table and each record holds an array of
+    symptom ids, while precautions and medicines share one string object per
+    distinct value. Records are only turned into dicts when accessed.
+    """
+
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.version = dataset_version(data)
+        self.symptoms: List[str] = []
+        symptom_ids: Dict[str, int] = {}
+        strings: Dict[str, str] = {}
+        
+        def intern_symptom(value: str) -> int:
+            if value not in symptom_ids:
+                symptom_ids[value] = len(self.symptoms)
+                self.symptoms.append(value)
+            return symptom_ids[value]
+        
+        self.records = [
+            DiseaseRecord(
+                disease["id"],
+                disease["disease"],
+                disease["description"],
+                array("I", (intern_symptom(symptom) for symptom in disease["symptoms"])),
+                tuple(strings.setdefault(value, value) for value in disease["precautions"]),
+                tuple(strings.setdefault(value, value) for value in disease["medicines"]),
+            )
+            for disease in data
+        ]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def symptom_ids(self, disease_idx: int) -> array:
+        return self.records[disease_idx].symptom_ids
+
+    def symptom(self, symptom_id: int) -> str:
+        return self.symptoms[symptom_id]
+
+    def disease_ids(self) -> List[str]:
+        return [record.id for record in self.records]
+
+    def __getitem__(self, disease_idx):
+        if isinstance(disease_idx, slice):
+            return [self[position] for position in range(*disease_idx.indices(len(self.records)))]
+        record = self.records[disease_idx]
+        return {
+            "id": record.id,
+            "disease": record.disease,
+            "symptoms": [self.symptoms[symptom_id] for symptom_id in record.symptom_ids],
+            "description": record.description,
+            "precautions": list(record.precautions),
+            "medicines": list(record.medicines),
+        }
+
+def read_csv_dataset(path: str) -> List[Dict[str, Any]]:
+    """Records of a CSV dataset whose list columns are separated by semicolons"""
+    records = []
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            record = {}
+            for field in DISEASE_FIELDS:
+                value = (row.get(field) or "").strip()
+                if field in LIST_FIELDS:
+                    record[field] = [item.strip() for item in value.split(";") if item.strip()]
+                elif value or field != "id":
+                    record[field] = value
+            records.append(record)
+    return records
+
+def read_medical_data(path: str):
+    """Dataset at path: a compiled catalog, a CSV file or a JSON list of records"""
+    with open(path, "rb") as handle:
+        magic = handle.read(len(CompiledCatalog.MAGIC))
+    if magic == CompiledCatalog.MAGIC:
+        return CompiledCatalog(path)
+    if path.lower().endswith(".csv"):
+        return read_csv_dataset(path)
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+def build_dataset(input_path: str, output_path: str) -> int:
+    """Compile a JSON/CSV dataset into a catalog file; returns the number of diseases"""
+    data = read_medical_data(input_path)
+    records = assign_disease_ids([
+        {field: disease[field] for field in DISEASE_FIELDS if field in disease} for disease in data
+    ])
+    missing = [field for field in DISEASE_FIELDS for disease in records if field not in disease]
+    if missing:
+        raise ValueError(f"Records are missing fields: {sorted(set(missing))}")
+    CompiledCatalog.write(records, output_path)
+    return len(records)
+
+class DatasetSnapshot:
+    """Immutable bundle of a dataset and everything derived from it.
+
+    Handlers read the current snapshot once and use it throughout, so a
+    reload swapping in a new snapshot never changes data under a request
+    that is already running.
+    """
+
+    def __init__(self, data, generation: int, source: str = ""):
+        # Compiled catalogs had their ids and content hash fixed when built
+        if not isinstance(data, CompiledCatalog):
+            data = InternedCatalog(assign_disease_ids(data))
+        self.data = data
+        self.version = data.version
+        self.generation = generation
+        self.source = source
+        self.loaded_at = time.time()
+        self.index_by_id = {disease_id: disease_idx for disease_idx, disease_id in enumerate(data.disease_ids())}
+        self.symptom_index = SymptomIndex(data)
+        self.canonicalizer = SymptomCanonicalizer(self.symptom_index, read_symptom_aliases(SYMPTOM_ALIASES_PATH))
+        self.engine = create_scoring_engine(os.environ.get("SCORING_ENGINE", "python"), self.symptom_index)
+        self._engines = {self.engine.name: self.engine}
+        self._engines_lock = threading.Lock()
+        # Everything that needs whole records comes from a single decoding
+        # pass, done here so reloads build it off the event loop and preloaded
+        # workers share it
+        records = list(data)
+        self.search_index = DiseaseSearchIndex(records)
+        # Payloads that only change with the dataset
+        self.disease_list_response = PreparedResponse([
+            {"id": disease["id"], "disease": disease["disease"], "symptoms": disease["symptoms"]} for disease in records
+        ])
+        self.catalog_response = PreparedResponse(records)
+
+    def prediction(self, disease_idx: int, confidence: float, matching_symptoms: List[str]) -> DiseasePrediction:
+        """Materialize the response model for a ranked disease"""
+        disease_data = self.data[disease_idx]
+        return DiseasePrediction(
+            id=disease_data["id"],
+            disease=disease_data["disease"],
+            confidence=confidence,
+            matching_symptoms=matching_symptoms,
+            total_symptoms=len(disease_data["symptoms"]),
+            description=disease_data["description"],
+            precautions=disease_data["precautions"],
+            medicines=disease_data["medicines"]
+        )
+
+    def scoring_engine(self, name: str = None) -> ScoringEngine:
+        """The configured engine, or the one named, built on first use"""
+        if name is None:
+            return self.engine
+        engine = self._engines.get(name)
+        if engine is None:
+            with self._engines_lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    engine = self._engines[name] = create_scoring_engine(name, self.symptom_index)
+        return engine
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "generation": self.generation,
+            "diseases": len(self.data),
+            "symptoms": len(self.symptom_index.vocabulary),
+            "scoring_engine": self.engine.name,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+        }
+
+# The snapshot new requests see; replaced as a whole by publish_snapshot()
+SNAPSHOT: DatasetSnapshot
+_generations = itertools.count(1)
+_reload_lock = asyncio.Lock()
+# path -> file_signature() of the file as this worker last loaded it
+_loaded_signatures: Dict[str, tuple] = {}
+
+def publish_snapshot(snapshot: DatasetSnapshot):
+    """Make snapshot the one new requests see"""
+    global SNAPSHOT
+    SNAPSHOT = snapshot
+    # Cached predictions are keyed by generation; drop the old ones early
+    PREDICTION_CACHE.clear()
+
+def load_medical_data(data, source: str = "") -> DatasetSnapshot:
+    """(Re)build everything derived from the medical dataset and publish it"""
+    snapshot = DatasetSnapshot(data, next(_generations), source)
+    publish_snapshot(snapshot)
+    return snapshot
+
+async def reload_medical_data(path: str = None) -> DatasetSnapshot:
+    """Build a snapshot of the dataset file in a worker thread, then swap it in.
+
+    Requests keep being served from the current snapshot while the new one
+    is built; concurrent reloads run one after the other.
+    """
+    path = path or MEDICAL_DATA_PATH
+    async with _reload_lock:
+        generation = next(_generations)
+        signature = await asyncio.to_thread(file_signature, path)
+        snapshot = await asyncio.to_thread(lambda: DatasetSnapshot(read_medical_data(path), generation, path))
+        publish_snapshot(snapshot)
+        _loaded_signatures[path] = signature
+    logger.info("Loaded dataset %s (version %s, generation %s)", path, snapshot.version, snapshot.generation)
+    return snapshot
+
+def file_signature(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+async def watch_medical_data(path: str, interval: float):
+    """Reload the dataset whenever its file changes; a bad file keeps the current snapshot"""
+    last = _loaded_signatures.get(path)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            current = file_signature(path)
+        except OSError:
+            continue
+        if current == last:
+            continue
+        last = current
+        # Already loaded by this worker, through an admin reload
+        if current == _loaded_signatures.get(path):
+            continue
+        try:
+            await reload_medical_data(path)
+        except Exception:
+            logger.exception("Reloading %s failed; still serving dataset version %s", path, SNAPSHOT.version)
+
+_loaded_signatures[MEDICAL_DATA_PATH] = file_signature(MEDICAL_DATA_PATH)
+load_medical_data(read_medical_data(MEDICAL_DATA_PATH), MEDICAL_DATA_PATH)
+
+class ScoringSaturated(Exception):
+    """The scoring executor already holds its maximum of pending calls"""
+
+def rank_in_process(version: str, source: str, engine_name: str, batch: List[List[str]], limit: int, min_confidence: float) -> List[List[tuple]]:
+    """rank_batch() in a scoring process, against the dataset version the parent scored with.
+
+    Forked workers start with the parent's snapshot and indexes; after a
+    reload they build the new version from its file once.
+    """
+    snapshot = SNAPSHOT
+    if snapshot.version != version:
+        snapshot = load_medical_data(read_medical_data(source), source)
+        if snapshot.version != version:
+            raise RuntimeError(f"{source} holds dataset version {snapshot.version}, expected {version}")
+    return snapshot.scoring_engine(engine_name).rank_batch(batch, limit, min_confidence)
+
+class ScoringExecutor:
+    """Decides where CPU-bound scoring runs so it does not stall the event loop.
+
+    The cost of a call is the number of (symptom set, disease) pairs it
+    scores. Calls up to `inline_cost` run inline, where a thread hop would
+    cost more than the work. Larger ones run in a thread pool. With the
+    "process" mode, calls of at least `process_cost` run in a pool of forked
+    processes that share the parent's indexes, so big batches use more than
+    one core. The "inline" mode keeps everything on the event loop.
+
+    At most `queue_max` calls wait or run off the loop; beyond that calls
+    are rejected with ScoringSaturated instead of piling up.
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode: str, inline_cost: int, process_cost: int, threads: int, processes: int, queue_max: int):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown scoring executor {mode!r}, expected one of {self.MODES}")
+        self.mode = mode
+        self.inline_cost = inline_cost
+        self.process_cost = process_cost
+        self.threads = threads
+        self.processes = processes
+        self.queue_max = queue_max
+        self.pending = 0
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Create the pools; scoring processes are forked now, before any request state exists"""
+        if self.mode != "inline" and self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="scoring")
+        if self.mode == "process" and self._process_pool is None:
+            context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+            self._process_pool = ProcessPoolExecutor(self.processes, mp_context=context)
+            # Forking pools launch every worker on the first submit
+            self._process_pool.submit(os.getpid)
+
+    def shutdown(self):
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.queue_max
+
+    def strategy(self, cost: int, processes: bool = True) -> str:
+        """Where a call of this cost runs"""
+        if self.mode == "inline" or cost <= self.inline_cost or self._thread_pool is None:
+            return "inline"
+        if processes and self._process_pool is not None and cost >= self.process_cost:
+            return "process"
+        return "thread"
+
+    async def run(self, cost: int, function, *args, reject: bool = True):
+        """function(*args), inline or in the thread pool depending on cost.
+
+        With reject=False the call waits for the pool even when it is
+        saturated; for callers that can no longer answer with 429.
+        """
+        return await self._submit(self.strategy(cost, processes=False), reject, function, *args)
+
+    async def rank_batch(self, snapshot, engine_name: str, batch: List[List[str]], limit: int, min_confidence: float = 0.0) -> List[List[tuple]]:
+        """snapshot's engine rank_batch(), wherever its cost says it should run"""
+        engine = snapshot.scoring_engine(engine_name)
+        # Scoring processes cannot be sampled; profiled requests score in threads
+        processes = bool(snapshot.source) and not PROFILING.get()
+        strategy = self.strategy(len(batch) * len(snapshot.data), processes=processes)
+        if strategy == "process":
+            return await self._submit(strategy, True, rank_in_process, snapshot.version, snapshot.source, engine.name, batch, limit, min_confidence)
+        return await self._submit(strategy, True, engine.rank_batch, batch, limit, min_confidence)
+
+    async def _submit(self, strategy: str, reject: bool, function, *args):
+        if strategy == "inline":
+            SCORING_JOBS.labels(strategy).inc()
+            return function(*args)
+        if reject and self.saturated:
+            SCORING_JOBS.labels("rejected").inc()
+            raise ScoringSaturated(f"{self.pending} scoring calls pending")
+        SCORING_JOBS.labels(strategy).inc()
+        pool = self._process_pool if strategy == "process" else self._thread_pool
+        if strategy == "thread" and PROFILING.get():
+            function = profiled(function)
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pending": self.pending,
+            "queue_max": self.queue_max,
+            "inline_cost": self.inline_cost,
+            "process_cost": self.process_cost,
+        }
+
+SCORING_EXECUTOR = ScoringExecutor(
+    os.environ.get("SCORING_EXECUTOR", "thread"),
+    inline_cost=int(os.environ.get("SCORING_INLINE_COST", "5000")),
+    process_cost=int(os.environ.get("SCORING_PROCESS_COST", "500000")),
+    threads=int(os.environ.get("SCORING_THREADS", "4")),
+    processes=int(os.environ.get("SCORING_PROCESSES", str(os.cpu_count() or 1))),
+    queue_max=int(os.environ.get("SCORING_QUEUE_MAX", "64")),
+)
+# Seconds clients are asked to wait after a 429
+SCORING_RETRY_AFTER = int(os.environ.get("SCORING_RETRY_AFTER", "1"))
+
+def scoring_saturated(error: ScoringSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Server busy: {error}; retry later",
+        headers={"Retry-After": str(SCORING_RETRY_AFTER)},
+    )
+
+def prediction_query(snapshot: DatasetSnapshot, request: SymptomRequest) -> tuple:
+    """Cache key of a request: (canonical symptoms, top_k, min_confidence, engine name)"""
+    engine = snapshot.scoring_engine(request.engine)
+    return snapshot.canonicalizer.canonical_symptoms(request.symptoms), request.top_k, request.min_confidence, engine.name
+
+async def predict_cached(snapshot: DatasetSnapshot, queries: List[tuple], timer: StageTimer) -> Dict[tuple, List[DiseasePrediction]]:
+    """Predictions for each prediction_query(), through the in-process and shared caches.
+
+    Building the response models of computed predictions is charged to
+    timer's serialization stage; the engines time their own stages.
+    """
+    results = {query: PREDICTION_CACHE.get((snapshot.generation, query)) for query in queries}
+    missing = [query for query, predictions in results.items() if predictions is None]
+    if not missing:
+        return results
     
-    # Cap at 95% for realistic medical prediction
-    confidence = min(confidence, 95.0)
+    # Queries other requests are already predicting are awaited, not recomputed
+    predicted = await PREDICT_FLIGHTS.do_many(
+        [(snapshot.generation, query) for query in missing],
+        lambda keys: predict_uncached(snapshot, [query for _, query in keys], timer),
+    )
+    results.update(zip(missing, predicted))
+    return results
+
+async def predict_uncached(snapshot: DatasetSnapshot, queries: List[tuple], timer: StageTimer) -> List[List[DiseasePrediction]]:
+    """Predictions for queries missing from the in-process cache, which they are then stored in"""
+    # Rankings shared through Redis hold dataset indices, valid for this dataset version
+    shared = await REDIS_CACHE.get_many(snapshot.version, "predict", queries)
+    rankings = {query: ranked for query, ranked in zip(queries, shared) if ranked is not None}
+    # Queries with the same selection and engine are ranked as one batch
+    groups: Dict[tuple, List[tuple]] = {}
+    for query in queries:
+        if query not in rankings:
+            groups.setdefault(query[1:], []).append(query)
+    for (top_k, min_confidence, engine_name), uncached in groups.items():
+        try:
+            ranked = await SCORING_EXECUTOR.rank_batch(snapshot, engine_name, [list(query[0]) for query in uncached], top_k, min_confidence)
+        except ScoringSaturated as error:
+            raise scoring_saturated(error)
+        computed = dict(zip(uncached, ranked))
+        await REDIS_CACHE.set_many(snapshot.version, "predict", computed)
+        rankings.update(computed)
     
-    return confidence, exact_matches + partial_matches
+    timer.restart()
+    results = []
+    for query in queries:
+        results.append([
+            snapshot.prediction(disease_idx, confidence, matching_symptoms)
+            for disease_idx, confidence, matching_symptoms in rankings[query]
+        ])
+        PREDICTION_CACHE.set((snapshot.generation, query), results[-1])
+    timer.lap("serialization")
+    return results
 
 @app.get("/api/")
 async def root():
     return {"message": "Curely 2.0 - Smart Medical Assistant API", "status": "active"}
 
-@app.post("/api/predict-disease")
-async def predict_disease(request: SymptomRequest) -> List[DiseasePrediction]:
+@app.get("/api/healthz")
+async def healthz():
+    """Liveness: the worker is up and its event loop responds"""
+    return {"status": "ok"}
+
+@app.get("/api/readyz")
+async def readyz():
+    """Readiness: the dataset and its indexes are built and the worker is not shutting down"""
+    if not app.state.ready:
+        raise HTTPException(status_code=503, detail="Not ready")
+    snapshot = SNAPSHOT
+    return {"status": "ready", "version": snapshot.version, "diseases": len(snapshot.data)}
+
+def dump_predictions(predictions) -> list:
+    """Plain data of a list of predictions, or of a list of such lists"""
+    return [dump_predictions(item) if isinstance(item, list) else item.model_dump() for item in predictions]
+
+def prediction_response(predictions, timer: StageTimer) -> Response:
+    """JSON response of predictions, dumped and encoded here so both are timed as serialization"""
+    timer.restart()
+    body = dumps_json(dump_predictions(predictions))
+    timer.lap("serialization")
+    timer.observe()
+    return Response(content=body, media_type="application/json")
+
+@app.post("/api/predict-disease", response_model=List[DiseasePrediction])
+async def predict_disease(request: SymptomRequest) -> Response:
     """Predict diseases based on symptoms"""
     if not request.symptoms:
         raise HTTPException(status_code=400, detail="No symptoms provided")
     
-    predictions = []
+    snapshot = SNAPSHOT
+    timer = StageTimer()
+    try:
+        query = prediction_query(snapshot, request)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    timer.lap("normalization")
+    predictions = (await predict_cached(snapshot, [query], timer))[query]
+    PREDICTION_SETS.labels("predict").observe(1)
+    PREDICTIONS_RETURNED.labels("predict").observe(len(predictions))
+    return prediction_response(predictions, timer)
+
+@app.post("/api/predict-disease/batch", response_model=List[List[DiseasePrediction]])
+async def predict_disease_batch(requests: List[SymptomRequest]) -> Response:
+    """Predict diseases for many symptom sets in one call"""
+    if not requests:
+        raise HTTPException(status_code=400, detail="No symptom sets provided")
+    if len(requests) > PREDICT_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {PREDICT_BATCH_MAX} symptom sets per batch")
+    for position, request in enumerate(requests):
+        if not request.symptoms:
+            raise HTTPException(status_code=400, detail=f"No symptoms provided for symptom set {position}")
     
-    for disease_data in MEDICAL_DATA:
-        confidence, matching_symptoms = calculate_confidence(request.symptoms, disease_data["symptoms"])
-        
-        if confidence > 0:  # Only include diseases with some match
-            prediction = DiseasePrediction(
-                id=disease_data["id"],
-                disease=disease_data["disease"],
-                confidence=round(confidence, 1),
-                matching_symptoms=matching_symptoms,
-                total_symptoms=len(disease_data["symptoms"]),
-                description=disease_data["description"],
-                precautions=disease_data["precautions"],
-                medicines=disease_data["medicines"]
-            )
-            predictions.append(prediction)
+    snapshot = SNAPSHOT
+    timer = StageTimer()
+    batch = []
+    for position, request in enumerate(requests):
+        try:
+            batch.append(prediction_query(snapshot, request))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"Symptom set {position}: {error}")
+    timer.lap("normalization")
     
-    # Sort by confidence score
-    predictions.sort(key=lambda x: x.confidence, reverse=True)
+    results = await predict_cached(snapshot, list(dict.fromkeys(batch)), timer)
+    PREDICTION_SETS.labels("batch").observe(len(batch))
+    PREDICTIONS_RETURNED.labels("batch").observe(sum(len(results[query]) for query in batch))
+    return prediction_response([results[query] for query in batch], timer)
+
+NDJSON_BATCH_SIZE = int(os.environ.get("NDJSON_BATCH_SIZE", "256"))
+
+def parse_symptom_line(line: bytes) -> List[str]:
+    """Symptom list of one NDJSON line, given as a JSON array or a {"symptoms": [...]} object"""
+    payload = json.loads(line)
+    if isinstance(payload, dict):
+        payload = payload.get("symptoms")
+    if not isinstance(payload, list) or not all(isinstance(symptom, str) for symptom in payload):
+        raise ValueError("Expected a list of symptom strings")
+    if not payload:
+        raise ValueError("No symptoms provided")
+    return payload
+
+class NDJSONPredictor:
+    """Scores NDJSON symptom lines in fixed-size batches and tracks throughput.
+
+    Only one batch of lines is held at a time, so memory use does not depend
+    on the size of the input.
+    """
+
+    def __init__(self, batch_size: int = NDJSON_BATCH_SIZE):
+        self.batch_size = batch_size
+        # Every line of one stream is scored against the same dataset
+        self.snapshot = SNAPSHOT
+        self.rows = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._line_number = 0
+        self._pending: List[tuple] = []
+
+    def __len__(self) -> int:
+        """Lines queued for the next batch"""
+        return len(self._pending)
+
+    def feed(self, line: bytes) -> List[str]:
+        """Queue one input line; returns the output lines of a completed batch"""
+        self._line_number += 1
+        if not line.strip():
+            return []
+        self._pending.append((self._line_number, line))
+        if len(self._pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> List[str]:
+        """Score every queued line and return their output lines in input order"""
+        output: Dict[int, str] = {}
+        scored = []
+        canonicalizer = self.snapshot.canonicalizer
+        timer = StageTimer()
+        for line_number, line in self._pending:
+            try:
+                scored.append((line_number, list(canonicalizer.canonical_symptoms(parse_symptom_line(line)))))
+            except ValueError as error:
+                self.errors += 1
+                output[line_number] = json.dumps({"line": line_number, "error": str(error)})
+        timer.lap("normalization")
+        timer.observe()
+        
+        ranked = self.snapshot.engine.rank_batch([normalized for _, normalized in scored], TOP_K_DEFAULT) if scored else []
+        timer = StageTimer()
+        for (line_number, _), predictions in zip(scored, ranked):
+            output[line_number] = json.dumps({
+                "line": line_number,
+                "predictions": [
+                    self.snapshot.prediction(disease_idx, confidence, matching_symptoms).model_dump()
+                    for disease_idx, confidence, matching_symptoms in predictions
+                ],
+            })
+        timer.lap("serialization")
+        timer.observe()
+        
+        self.rows += len(self._pending)
+        self._pending = []
+        return [output[line_number] + "\n" for line_number in sorted(output)]
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+def iter_ndjson_predictions(lines: Iterable[bytes], predictor: NDJSONPredictor) -> Iterator[str]:
+    """Prediction lines for a synchronous stream of NDJSON input lines"""
+    for line in lines:
+        yield from predictor.feed(line)
+    yield from predictor.flush()
+
+def feed_lines(predictor: NDJSONPredictor, lines: List[bytes], flush: bool = False) -> List[str]:
+    """Output lines of the batches completed by feeding lines, and of the rest when flushing"""
+    output = [prediction for line in lines for prediction in predictor.feed(line)]
+    if flush:
+        output += predictor.flush()
+    return output
+
+async def stream_ndjson_predictions(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Prediction lines for a chunked NDJSON body, ending with a throughput summary line"""
+    predictor = NDJSONPredictor()
+    cost = len(predictor.snapshot.data)
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        # The response has started, so a busy executor is waited for, not refused
+        for output in await SCORING_EXECUTOR.run(cost * len(lines), feed_lines, predictor, lines, reject=False):
+            yield output
+    for output in await SCORING_EXECUTOR.run(cost * (len(predictor) + 1), feed_lines, predictor, [pending], True, reject=False):
+        yield output
+    PREDICTION_SETS.labels("stream").observe(predictor.rows)
+    yield json.dumps({"summary": predictor.summary()}) + "\n"
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streams while the request body is still being read.
+
+    StreamingResponse consumes `receive` to watch for disconnects, which would
+    swallow request body chunks; a disconnect surfaces as ClientDisconnect from
+    the body stream instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+@app.post("/api/predict-disease/stream")
+async def predict_disease_stream(request: Request):
+    """Predict diseases for an NDJSON body of symptom lists, one result line per input line"""
+    if SCORING_EXECUTOR.saturated:
+        raise scoring_saturated(ScoringSaturated(f"{SCORING_EXECUTOR.pending} scoring calls pending"))
+    return NDJSONStreamingResponse(stream_ndjson_predictions(request.stream()))
+
+class PredictionSession:
+    """Incremental match counts of a symptom set refined one symptom at a time.
+
+    Each candidate disease has a packed (exact, partial) match count and sits
+    in the bucket of that count. Adding or removing a symptom only walks the
+    postings of that symptom and of the dataset symptoms it partially
+    matches, moving the diseases it touches between buckets. For a given
+    number of symptoms, confidence only depends on the bucket and grows with
+    exact + 0.7 * partial, so the top predictions are read from the best
+    buckets, each a heap of disease indices for the dataset-order tie-break.
+    Rankings equal those of the heuristic engines for the same symptoms.
+
+    This is a per-worker cache: the session itself is its record (symptoms,
+    options and last ranking, see session_record), from which any worker can
+    rebuild the counts.
+    """
+
+    # count = exact * EXACT + partial
+    EXACT = 1 << 20
+    # Rough heap memory per candidate disease: counts entry, heap slot and int
+    CANDIDATE_BYTES = 120
+
+    def __init__(self, snapshot: DatasetSnapshot, top_k: int, min_confidence: float):
+        self.snapshot = snapshot
+        self.top_k = top_k
+        self.min_confidence = min_confidence
+        self.symptoms: set = set()
+        # disease index -> count, and count -> heap of disease indices with it;
+        # heaps drop stale entries lazily, `sizes` counts the live ones
+        self.counts: Dict[int, int] = {}
+        self.buckets: Dict[int, List[int]] = {}
+        self.sizes: Counter = Counter()
+        # term id -> number of session symptoms partially matching it
+        self.partial_terms = Counter()
+
+    def _count(self, term_id: int, delta: int):
+        counts, buckets, sizes = self.counts, self.buckets, self.sizes
+        for disease_idx in self.snapshot.symptom_index.diseases(term_id):
+            old = counts.get(disease_idx, 0)
+            new = old + delta
+            if old:
+                sizes[old] -= 1
+                if not sizes[old]:
+                    del sizes[old], buckets[old]
+            if not new:
+                del counts[disease_idx]
+                continue
+            counts[disease_idx] = new
+            sizes[new] += 1
+            bucket = buckets.setdefault(new, [])
+            heapq.heappush(bucket, disease_idx)
+            if len(bucket) > 2 * sizes[new] + 16:
+                bucket[:] = sorted({idx for idx in bucket if counts.get(idx) == new})
+
+    def add(self, symptom: str):
+        """Add a canonical symptom"""
+        if symptom in self.symptoms:
+            return
+        index = self.snapshot.symptom_index
+        self.symptoms.add(symptom)
+        term_id = index.term_ids.get(symptom)
+        if term_id is not None:
+            self._count(term_id, self.EXACT)
+            # An exact match of the request no longer counts as a partial one
+            if self.partial_terms[term_id]:
+                self._count(term_id, -self.partial_terms[term_id])
+        for related_id in index.matcher.related_memo(symptom):
+            self.partial_terms[related_id] += 1
+            if index.vocabulary[related_id] not in self.symptoms:
+                self._count(related_id, 1)
+
+    def remove(self, symptom: str):
+        """Remove a canonical symptom"""
+        if symptom not in self.symptoms:
+            return
+        index = self.snapshot.symptom_index
+        for related_id in index.matcher.related_memo(symptom):
+            self.partial_terms[related_id] -= 1
+            if not self.partial_terms[related_id]:
+                del self.partial_terms[related_id]
+            if index.vocabulary[related_id] not in self.symptoms:
+                self._count(related_id, -1)
+        self.symptoms.discard(symptom)
+        term_id = index.term_ids.get(symptom)
+        if term_id is not None:
+            self._count(term_id, -self.EXACT)
+            if self.partial_terms[term_id]:
+                self._count(term_id, self.partial_terms[term_id])
+
+    def sync(self, symptoms: set):
+        """Add and remove whatever differs from symptoms"""
+        for symptom in self.symptoms - symptoms:
+            self.remove(symptom)
+        for symptom in symptoms - self.symptoms:
+            self.add(symptom)
+
+    def _smallest(self, count: int, limit: int) -> List[int]:
+        """The `limit` lowest disease indices with a count, cleaning stale heap entries on the way"""
+        bucket, counts = self.buckets[count], self.counts
+        taken = []
+        while bucket and len(taken) < limit:
+            disease_idx = heapq.heappop(bucket)
+            # Stale entries and duplicates of a disease that moved back are dropped for good
+            if counts.get(disease_idx) == count and (not taken or taken[-1] != disease_idx):
+                taken.append(disease_idx)
+        for disease_idx in taken:
+            heapq.heappush(bucket, disease_idx)
+        return taken
+
+    def rank(self) -> List[tuple]:
+        """Top (disease index, rounded confidence, matching symptoms) of the current symptoms"""
+        user_count = len(self.symptoms)
+        levels: Dict[float, List[int]] = {}
+        for count in self.buckets:
+            exact, partial = divmod(count, self.EXACT)
+            confidence = round(confidence_from_matches(exact, partial, user_count), 1)
+            if confidence > 0 and confidence >= self.min_confidence:
+                levels.setdefault(confidence, []).append(count)
+        
+        best = []
+        for confidence in sorted(levels, reverse=True):
+            remaining = self.top_k - len(best)
+            if remaining <= 0:
+                break
+            # Buckets rounding to the same confidence (all of them at the 95 cap) tie on dataset order
+            tied = heapq.merge(*(self._smallest(count, remaining) for count in levels[confidence]))
+            best.extend((disease_idx, confidence) for disease_idx in itertools.islice(tied, remaining))
+        
+        index = self.snapshot.symptom_index
+        normalized_user = sorted(self.symptoms)
+        related = index.matcher.partial_matches(normalized_user)
+        return [
+            (disease_idx, confidence, index.matching_symptoms(normalized_user, related, disease_idx))
+            for disease_idx, confidence in best
+        ]
+
+    def footprint(self) -> int:
+        """Approximate bytes held by the counts"""
+        return len(self.counts) * self.CANDIDATE_BYTES + 8 * sum(len(bucket) for bucket in self.buckets.values())
+
+class SessionStates:
+    """Per-worker LRU of PredictionSessions, bounded by the memory their counts hold"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._states: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def get(self, session_id: str) -> Optional[PredictionSession]:
+        entry = self._states.get(session_id)
+        if entry is None:
+            return None
+        self._states.move_to_end(session_id)
+        return entry[0]
+
+    def set(self, session_id: str, state: PredictionSession):
+        self.discard(session_id)
+        footprint = state.footprint()
+        self._states[session_id] = (state, footprint)
+        self.bytes += footprint
+        while self.bytes > self.max_bytes and len(self._states) > 1:
+            _, (_, evicted) = self._states.popitem(last=False)
+            self.bytes -= evicted
+
+    def discard(self, session_id: str):
+        entry = self._states.pop(session_id, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+class SessionRequest(BaseModel):
+    symptoms: List[str] = []
+    top_k: int = Field(TOP_K_DEFAULT, ge=1, le=TOP_K_MAX)
+    min_confidence: float = Field(0.0, ge=0, le=100)
+
+class SessionUpdate(BaseModel):
+    add: List[str] = []
+    remove: List[str] = []
+    # The session as last returned to the client. Sent back, it lets any
+    # worker rebuild a session it does not hold (or that expired)
+    symptoms: Optional[List[str]] = None
+    top_k: Optional[int] = Field(None, ge=1, le=TOP_K_MAX)
+    min_confidence: Optional[float] = Field(None, ge=0, le=100)
+
+PREDICTION_SESSION_TTL = int(os.environ.get("PREDICTION_SESSION_TTL", "1800"))
+# Session records: symptoms, options and last ranking. Kept in this worker
+# and, when configured, in Redis so every worker sees every session
+PREDICTION_SESSIONS = TTLCache(
+    maxsize=int(os.environ.get("PREDICTION_SESSION_MAX", "1000")),
+    ttl=PREDICTION_SESSION_TTL,
+)
+# Incremental counts of recently used sessions, rebuilt from their record when evicted
+SESSION_STATES = SessionStates(int(os.environ.get("PREDICTION_SESSION_MEMORY_MB", "128")) * 1024 * 1024)
+
+async def session_record(snapshot: DatasetSnapshot, session_id: str) -> Optional[Dict[str, Any]]:
+    """Record of a session, from the shared tier first since another worker may have updated it"""
+    record = await REDIS_CACHE.get(snapshot.version, "session", session_id)
+    return record or PREDICTION_SESSIONS.get(session_id)
+
+async def session_step(snapshot: DatasetSnapshot, session_id: str, record: Dict[str, Any], update: SessionUpdate) -> Dict[str, Any]:
+    """Apply an update on top of a session record, save the new record and return the delta"""
+    state = SESSION_STATES.get(session_id)
+    if state is None or state.snapshot is not snapshot or (state.top_k, state.min_confidence) != (record["top_k"], record["min_confidence"]):
+        state = PredictionSession(snapshot, record["top_k"], record["min_confidence"])
+    # Usually a no-op; catches up with steps served by other workers
+    state.sync(set(record["symptoms"]))
+    for symptom in update.remove:
+        state.remove(snapshot.canonicalizer.canonical(symptom))
+    for symptom in update.add:
+        state.add(snapshot.canonicalizer.canonical(symptom))
+    ranked = state.rank()
+    SESSION_STATES.set(session_id, state)
     
-    # Return top 5 predictions
-    return predictions[:5]
+    previous = {disease_id: [confidence, matching] for disease_id, confidence, matching in record.get("ranked", [])}
+    predictions = [snapshot.prediction(*ranked_disease) for ranked_disease in ranked]
+    ranking = [prediction.id for prediction in predictions]
+    current = set(ranking)
+    record = {
+        "version": snapshot.version,
+        "symptoms": sorted(state.symptoms),
+        "top_k": state.top_k,
+        "min_confidence": state.min_confidence,
+        "ranked": [[prediction.id, prediction.confidence, prediction.matching_symptoms] for prediction in predictions],
+    }
+    PREDICTION_SESSIONS.set(session_id, record)
+    await REDIS_CACHE.set(snapshot.version, "session", session_id, record, ttl=PREDICTION_SESSION_TTL)
+    PREDICTION_SETS.labels("session").observe(1)
+    return {
+        "session_id": session_id,
+        "version": snapshot.version,
+        "symptoms": record["symptoms"],
+        "ranking": ranking,
+        "changed": [
+            prediction for prediction in predictions
+            if previous.get(prediction.id) != [prediction.confidence, prediction.matching_symptoms]
+        ],
+        "removed": [disease_id for disease_id in previous if disease_id not in current],
+    }
+
+@app.post("/api/sessions")
+async def create_session(request: SessionRequest):
+    """Start a prediction session, optionally with initial symptoms.
+
+    `ranking` lists the ids of the session's predictions best first;
+    `changed` holds the predictions that are new or scored differently
+    since the previous step and `removed` the ids that dropped out.
+    """
+    snapshot = SNAPSHOT
+    record = {"version": snapshot.version, "symptoms": [], "top_k": request.top_k, "min_confidence": request.min_confidence}
+    return await session_step(snapshot, uuid.uuid4().hex, record, SessionUpdate(add=request.symptoms))
+
+@app.patch("/api/sessions/{session_id}")
+async def update_session(session_id: str, update: SessionUpdate):
+    """Add and remove symptoms; returns the new top predictions as a delta of the previous ones"""
+    snapshot = SNAPSHOT
+    record = await session_record(snapshot, session_id)
+    if update.symptoms is not None:
+        # The client's copy wins: it is the last step the client saw
+        symptoms = sorted({snapshot.canonicalizer.canonical(symptom) for symptom in update.symptoms})
+        record = {**(record or {"top_k": TOP_K_DEFAULT, "min_confidence": 0.0}), "symptoms": symptoms}
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session; send its symptoms to restore it")
+    if update.top_k is not None:
+        record["top_k"] = update.top_k
+    if update.min_confidence is not None:
+        record["min_confidence"] = update.min_confidence
+    return await session_step(snapshot, session_id, record, update)
+
+@app.get("/api/sessions/{session_id}")
+async def get_session_predictions(session_id: str):
+    """Current symptoms and top predictions of a session"""
+    snapshot = SNAPSHOT
+    record = await session_record(snapshot, session_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    if record["version"] != snapshot.version:
+        # Ranked on a dataset since reloaded; recount on the current one
+        await session_step(snapshot, session_id, record, SessionUpdate())
+        record = PREDICTION_SESSIONS.get(session_id)
+    return {
+        "session_id": session_id,
+        "version": snapshot.version,
+        "symptoms": record["symptoms"],
+        "predictions": [
+            snapshot.prediction(snapshot.index_by_id[disease_id], confidence, matching)
+            for disease_id, confidence, matching in record["ranked"]
+        ],
+    }
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    snapshot = SNAPSHOT
+    if await session_record(snapshot, session_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    PREDICTION_SESSIONS.delete(session_id)
+    SESSION_STATES.discard(session_id)
+    await REDIS_CACHE.delete(snapshot.version, "session", session_id)
+    return {"deleted": session_id}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this worker, or of every worker in multiprocess mode"""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(STATE_COLLECTOR)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss/eviction counters of the in-process caches"""
+    return {"predictions": PREDICTION_CACHE.stats(), "redis": REDIS_CACHE.stats()}
+
+def require_admin(x_admin_token: str = Header("")):
+    """Allow the request only with the configured admin token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/api/dataset")
+async def get_dataset_info():
+    """Version of the dataset being served; caches can key on it"""
+    return SNAPSHOT.info()
+
+@app.post("/api/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_dataset():
+    """Reload the dataset file without dropping requests.
+
+    Each worker process holds its own snapshot. The file's modification time
+    is bumped first, so the dataset watchers of the other workers (see
+    DATASET_WATCH_INTERVAL) reload it too. `other_workers_reload` is false
+    when they cannot: without a watcher, other workers keep their version.
+    """
+    touched = True
+    try:
+        os.utime(MEDICAL_DATA_PATH)
+    except OSError as error:
+        touched = False
+        logger.warning("Could not touch %s, other workers will not reload: %s", MEDICAL_DATA_PATH, error)
+    try:
+        snapshot = await reload_medical_data()
+    except (OSError, ValueError, KeyError) as error:
+        raise HTTPException(status_code=422, detail=f"Dataset reload failed: {error}")
+    return {**snapshot.info(), "other_workers_reload": touched and DATASET_WATCH_INTERVAL > 0}
+
+@app.get("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def download_profile():
+    """Collapsed stacks sampled so far, for flamegraph.pl or speedscope"""
+    stats = PROFILER.stats()
+    return Response(
+        content=PROFILER.collapsed(),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.collapsed"',
+            "X-Profile-Requests": str(stats["requests"]),
+            "X-Profile-Samples": str(stats["samples"]),
+        },
+    )
+
+@app.delete("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def reset_profile():
+    """Discard collected samples; returns the statistics they had"""
+    stats = PROFILER.stats()
+    PROFILER.reset()
+    return stats
+
+@app.get("/api/symptoms/suggest")
+async def suggest_symptoms(prefix: str = "", limit: int = Query(10, ge=1, le=SUGGEST_LIMIT_MAX)):
+    """Symptoms starting with prefix, most widely used first"""
+    index = SNAPSHOT.symptom_index
+    suggestions = []
+    for symptom in index.completions.complete(normalize_symptom(prefix), limit):
+        term_id = index.term_ids[symptom]
+        suggestions.append({"symptom": index.spellings[term_id], "name": symptom, "diseases": index.disease_counts[term_id]})
+    return suggestions
+
+DISEASE_IDS_MAX = 100
 
 @app.get("/api/disease/{disease_id}")
 async def get_disease_details(disease_id: str):
     """Get detailed information about a specific disease"""
-    for disease_data in MEDICAL_DATA:
-        if disease_data["id"] == disease_id:
-            return disease_data
+    snapshot = SNAPSHOT
+    disease_idx = snapshot.index_by_id.get(disease_id)
+    if disease_idx is None:
+        raise HTTPException(status_code=404, detail="Disease not found")
+    
+    return snapshot.data[disease_idx]
+
+@app.get("/api/disease")
+async def get_diseases_details(ids: str):
+    """Get detailed information about several diseases, given as comma-separated ids.
+
+    Records come back in the requested order; unknown ids are left out.
+    """
+    requested = list(dict.fromkeys(disease_id.strip() for disease_id in ids.split(",") if disease_id.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No disease ids provided")
+    if len(requested) > DISEASE_IDS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {DISEASE_IDS_MAX} disease ids per request")
     
-    raise HTTPException(status_code=404, detail="Disease not found")
+    snapshot = SNAPSHOT
+    data, by_id = snapshot.data, snapshot.index_by_id
+    return [data[by_id[disease_id]] for disease_id in requested if disease_id in by_id]
 
 @app.get("/api/diseases")
-async def get_all_diseases():
+async def get_all_diseases(request: Request):
     """Get list of all diseases"""
-    return [{"id": disease["id"], "disease": disease["disease"], "symptoms": disease["symptoms"]} for disease in MEDICAL_DATA]
+    return SNAPSHOT.disease_list_response.response(request)
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+SEARCH_FIELDS = ("id", "disease", "symptoms", "description", "precautions", "medicines")
+
+async def search_matches(snapshot: DatasetSnapshot, normalized_query: str) -> List[int]:
+    """Ranked indices of the diseases matching a tokenized query, through the shared cache"""
+    matches = await REDIS_CACHE.get(snapshot.version, "fulltext", normalized_query)
+    if matches is None:
+        matches = snapshot.search_index.search(normalized_query)
+        await REDIS_CACHE.set(snapshot.version, "fulltext", normalized_query, matches)
+    return matches
 
 @app.get("/api/search-diseases")
-async def search_diseases(query: str = ""):
-    """Search diseases by name"""
-    if not query:
-        return MEDICAL_DATA
+async def search_diseases(
+    request: Request,
+    response: Response,
+    query: str = "",
+    limit: Optional[int] = Query(None, ge=1, le=SEARCH_LIMIT_MAX),
+    offset: int = Query(0, ge=0),
+    fields: str = "",
+):
+    """Search diseases by name, description and symptoms.
+
+    Results are ranked best first and paginated with limit/offset; the total
+    number of matches is returned in X-Total-Count. `fields` restricts each
+    record to a comma-separated list of keys. Without any parameter the whole
+    catalog is returned.
+    """
+    snapshot = SNAPSHOT
+    if not query and limit is None and not offset and not fields:
+        return snapshot.catalog_response.response(request)
+    
+    projection = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in projection if field not in SEARCH_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}, expected any of {list(SEARCH_FIELDS)}")
     
-    query_lower = query.lower()
-    filtered_diseases = [
-        disease for disease in MEDICAL_DATA 
-        if query_lower in disease["disease"].lower()
-    ]
+    data = snapshot.data
+    if query:
+        normalized_query = " ".join(tokenize(query))
+        matches = await SEARCH_FLIGHTS.do(
+            (snapshot.version, normalized_query), lambda: search_matches(snapshot, normalized_query)
+        )
+    else:
+        matches = range(len(data))
     
-    return filtered_diseases
+    response.headers["X-Total-Count"] = str(len(matches))
+    page = matches[offset:offset + (SEARCH_LIMIT_DEFAULT if limit is None else limit)]
+    if not projection:
+        return [data[disease_idx] for disease_idx in page]
+    return [{field: data[disease_idx][field] for field in projection} for disease_idx in page]
 
-if __name__ == "__main__":
+def predict_file(input_path: str, output_path: str, batch_size: int) -> Dict[str, Any]:
+    """Score an NDJSON file of symptom lists ("-" for stdin/stdout) and return the throughput summary"""
+    predictor = NDJSONPredictor(batch_size)
+    source = sys.stdin.buffer if input_path == "-" else open(input_path, "rb")
+    target = sys.stdout if output_path == "-" else open(output_path, "w")
+    try:
+        for output in iter_ndjson_predictions(source, predictor):
+            target.write(output)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return predictor.summary()
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Curely 2.0 - Smart Medical Assistant API")
+    commands = parser.add_subparsers(dest="command")
+    
+    serve = commands.add_parser("serve", help="Run the API server (default)")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8001)
+    serve.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help="Worker processes; production uses gunicorn.conf.py to build the indexes once before forking",
+    )
+    
+    predict = commands.add_parser("predict-file", help="Score an NDJSON file with one symptom list per line")
+    predict.add_argument("input", help="NDJSON input path, or - for stdin")
+    predict.add_argument("-o", "--output", default="-", help="NDJSON output path, or - for stdout")
+    predict.add_argument("--batch-size", type=int, default=NDJSON_BATCH_SIZE)
+    
+    build = commands.add_parser("build-dataset", help="Compile a JSON/CSV dataset into a memory-mapped catalog")
+    build.add_argument("input", help="JSON or CSV dataset")
+    build.add_argument("output", help="Compiled catalog path; point MEDICAL_DATA_PATH at it")
+    
+    args = parser.parse_args(argv)
+    if args.command == "build-dataset":
+        count = build_dataset(args.input, args.output)
+        print(f"Compiled {count} diseases into {args.output}", file=sys.stderr)
+        return
+    if args.command == "predict-file":
+        summary = predict_file(args.input, args.output, args.batch_size)
+        print(f"Scored {summary['rows']} rows ({summary['errors']} errors) in {summary['seconds']}s, "
+              f"{summary['rows_per_second']} rows/s", file=sys.stderr)
+        return
+    
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    host, port, workers = getattr(args, "host", "0.0.0.0"), getattr(args, "port", 8001), getattr(args, "workers", 1)
+    if workers > 1:
+        # Each worker imports the app (and loads the dataset) itself; as in
+        # gunicorn.conf.py, watching the file lets an admin reload reach them all
+        os.environ.setdefault("DATASET_WATCH_INTERVAL", "5")
+        uvicorn.run("server:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,335 @@
+"""Local benchmark suite for the prediction and search hot paths.
+
+Runs against synthetic catalogs loaded in-process, so results are
+reproducible and independent of any deployment:
+
+    python backend_benchmark.py --sizes 1k,10k,100k --output bench.json
+    python backend_benchmark.py --sizes 1k,10k --compare bench.json
+
+Microbenchmarks time single calls (calibrated iterations per round, like
+pytest-benchmark); the load test drives the ASGI app through httpx with
+concurrent clients. Results are written as JSON, and --compare exits
+non-zero when a benchmark's median got slower than --threshold.
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import httpx
+import server
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+WORDS = (
+    "acute chronic viral bacterial fungal allergic inflammatory autoimmune hereditary tropical "
+    "lung liver kidney skin joint heart blood nerve bone stomach throat eye ear brain bowel"
+).split()
+
+def synthetic_catalog(size: int, seed: int = 0) -> list:
+    """Disease records shaped like the bundled dataset, scaled to size.
+
+    The real symptoms head a vocabulary that grows with the catalog, and
+    diseases draw them with Zipf-like popularity, so a few symptoms (fatigue,
+    vomiting, ...) are listed by many diseases and most by only a handful.
+    Symptom counts per disease follow the bundled dataset.
+    """
+    rng = random.Random(seed)
+    real = server.read_medical_data(server.MEDICAL_DATA_PATH)
+    counts = [len(disease["symptoms"]) for disease in real]
+    popular = sorted(
+        {symptom for disease in real for symptom in disease["symptoms"]},
+        key=lambda symptom: -sum(symptom in disease["symptoms"] for disease in real),
+    )
+    vocabulary = popular + [
+        f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{index}" for index in range(max(200, size // 5))
+    ]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(vocabulary))))
+    precautions = [precaution for disease in real for precaution in disease["precautions"]]
+    medicines = [medicine for disease in real for medicine in disease["medicines"]]
+
+    catalog = []
+    for index in range(size):
+        symptoms = set()
+        target = rng.choice(counts)
+        while len(symptoms) < target:
+            symptoms.add(rng.choices(vocabulary, cum_weights=cum_weights)[0])
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} syndrome {index}"
+        catalog.append({
+            "disease": name,
+            "symptoms": sorted(symptoms),
+            "description": f"{name} is a {' '.join(rng.choices(WORDS, k=12))} condition.",
+            "precautions": rng.sample(precautions, 4),
+            "medicines": rng.sample(medicines, 3),
+        })
+    return catalog
+
+def symptom_queries(catalog: list, count: int, seed: int = 1) -> list:
+    """Patient-like symptom lists: a few symptoms of one disease, sometimes with noise"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        symptoms = rng.choice(catalog)["symptoms"]
+        query = rng.sample(symptoms, min(len(symptoms), rng.randint(1, 5)))
+        if rng.random() < 0.3:
+            query.append(rng.choice(rng.choice(catalog)["symptoms"]))
+        queries.append([symptom.replace("_", " ") if rng.random() < 0.5 else symptom for symptom in query])
+    return queries
+
+def search_queries(catalog: list, count: int, seed: int = 2) -> list:
+    """Search box input: whole names, name prefixes, symptoms and misspellings"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        disease = rng.choice(catalog)
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(disease["disease"])
+        elif kind < 0.6:
+            queries.append(disease["disease"][:rng.randint(2, 8)])
+        elif kind < 0.9:
+            queries.append(rng.choice(disease["symptoms"]).replace("_", " "))
+        else:
+            word = rng.choice(WORDS)
+            position = rng.randrange(len(word))
+            queries.append(word[:position] + word[position + 1:])
+    return queries
+
+def measure(func, rounds: int = 20, min_round_time: float = 0.01) -> dict:
+    """Per-call timing statistics in seconds, over calibrated rounds"""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - start >= min_round_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            timings.append((time.perf_counter() - start) / iterations)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    median = statistics.median(timings)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "median": median,
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": iterations,
+        "ops": 1 / median if median else math.inf,
+    }
+
+def cycle(items: list):
+    """Endless round-robin over items, so repeated calls see varied input"""
+    position = -1
+
+    def next_item():
+        nonlocal position
+        position = (position + 1) % len(items)
+        return items[position]
+    return next_item
+
+def microbenchmarks(catalog: list, rounds: int) -> dict:
+    """Time the hot functions against the dataset currently loaded in server"""
+    loop = asyncio.new_event_loop()
+    snapshot = server.SNAPSHOT
+    next_symptoms = cycle(symptom_queries(catalog, 200))
+    next_search = cycle([" ".join(server.tokenize(query)) for query in search_queries(catalog, 200)])
+    next_id = cycle([snapshot.data[index]["id"] for index in random.Random(3).sample(range(len(catalog)), 200)])
+    pairs = cycle([(symptoms, disease["symptoms"]) for symptoms, disease in zip(
+        symptom_queries(catalog, 200, seed=4), random.Random(5).sample(catalog, 200)
+    )])
+
+    def predict_uncached():
+        server.PREDICTION_CACHE.clear()
+        return loop.run_until_complete(server.predict_disease(server.SymptomRequest(symptoms=next_symptoms())))
+
+    def predict_cached():
+        return loop.run_until_complete(server.predict_disease(server.SymptomRequest(symptoms=next_symptoms())))
+
+    # Every query is seen once, so the cached benchmark only measures hits;
+    # it runs before predict_disease, which empties the cache on every call
+    for _ in range(200):
+        predict_cached()
+
+    benchmarks = {
+        "calculate_confidence": lambda: server.calculate_confidence(*pairs()),
+        "predict_disease_cached": predict_cached,
+        "predict_disease": predict_uncached,
+        "search_diseases": lambda: snapshot.search_index.search(next_search()),
+        "get_disease_details": lambda: loop.run_until_complete(server.get_disease_details(next_id())),
+    }
+    try:
+        return {name: measure(func, rounds) for name, func in benchmarks.items()}
+    finally:
+        loop.close()
+
+async def load_test(catalog: list, requests: int, concurrency: int) -> dict:
+    """Latency percentiles and throughput of a mixed request load through the ASGI app"""
+    snapshot = server.SNAPSHOT
+    rng = random.Random(6)
+    symptoms = symptom_queries(catalog, 500, seed=7)
+    searches = search_queries(catalog, 500, seed=8)
+    ids = [snapshot.data[index]["id"] for index in rng.sample(range(len(catalog)), min(500, len(catalog)))]
+    plan = []
+    for _ in range(requests):
+        kind = rng.random()
+        if kind < 0.6:
+            plan.append(("predict-disease", "POST", "/api/predict-disease", {"symptoms": rng.choice(symptoms)}))
+        elif kind < 0.85:
+            plan.append(("search-diseases", "GET", "/api/search-diseases", {"query": rng.choice(searches), "limit": 20}))
+        else:
+            plan.append(("disease", "GET", f"/api/disease/{rng.choice(ids)}", None))
+
+    latencies = {}
+    errors = 0
+    queue = iter(plan)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            nonlocal errors
+            for route, method, path, payload in queue:
+                start = time.perf_counter()
+                if method == "POST":
+                    response = await client.post(path, json=payload)
+                else:
+                    response = await client.get(path, params=payload)
+                latencies.setdefault(route, []).append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def percentiles(samples: list) -> dict:
+        samples = sorted(samples)
+        pick = lambda fraction: samples[min(len(samples) - 1, int(fraction * len(samples)))]
+        return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": samples[-1], "count": len(samples)}
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "latency": {route: percentiles(samples) for route, samples in sorted(latencies.items())},
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def run(sizes: list, rounds: int, requests: int, concurrency: int) -> dict:
+    # Measure the application, not a cache server that may happen to be configured
+    server.REDIS_CACHE = server.RedisCache()
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scoring_engine": os.environ.get("SCORING_ENGINE", "python"),
+            "timestamp": time.time(),
+        },
+        "catalogs": {},
+    }
+    for label in sizes:
+        catalog = synthetic_catalog(SIZES[label])
+        start = time.perf_counter()
+        server.load_medical_data(catalog, f"synthetic:{label}")
+        load_seconds = time.perf_counter() - start
+        print(f"📦 {label} catalog loaded in {load_seconds:.2f}s", file=sys.stderr)
+        results["catalogs"][label] = {
+            "load_seconds": load_seconds,
+            "micro": microbenchmarks(catalog, rounds),
+            "load": asyncio.run(load_test(catalog, requests, concurrency)),
+        }
+    return results
+
+def flatten(results: dict) -> dict:
+    """benchmark name -> seconds, comparable between runs (lower is better)"""
+    flat = {}
+    for label, catalog in results["catalogs"].items():
+        flat[f"{label}/load_seconds"] = catalog["load_seconds"]
+        for name, stats in catalog["micro"].items():
+            flat[f"{label}/{name}"] = stats["median"]
+        for route, stats in catalog["load"]["latency"].items():
+            flat[f"{label}/load/{route}/p50"] = stats["p50"]
+            flat[f"{label}/load/{route}/p95"] = stats["p95"]
+    return flat
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print a comparison table; returns the benchmarks slower than threshold"""
+    before, after = flatten(baseline), flatten(current)
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(before.keys() & after.keys()):
+        change = after[name] / before[name] - 1 if before[name] else 0.0
+        marker = ""
+        if change > threshold:
+            regressions.append(name)
+            marker = " ⚠️"
+        print(f"{name:<48} {before[name] * 1e6:>10.1f}µs {after[name] * 1e6:>10.1f}µs {change:>+7.1%}{marker}")
+    return regressions
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Curely prediction and search paths")
+    parser.add_argument("--sizes", default="1k,10k,100k", help="Comma-separated catalog sizes out of 1k, 10k, 100k")
+    parser.add_argument("--rounds", type=int, default=20, help="Timing rounds per microbenchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests sent by the load test")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent load test clients")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Slowdown reported as a regression (0.20 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes {unknown}, expected any of {list(SIZES)}")
+
+    results = run(sizes, args.rounds, args.requests, args.concurrency)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(json.load(handle), results, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
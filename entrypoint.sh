@@ -4,18 +4,33 @@ set -e
 # Start the FastAPI backend
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
+# Workers share metrics through files; start from a clean directory
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/curely-metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# Gunicorn with uvicorn workers; WEB_CONCURRENCY sets the worker count (see gunicorn.conf.py)
+gunicorn server:app -c gunicorn.conf.py &
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+echo "Waiting for backend to become ready..."
+READY_TIMEOUT="${READY_TIMEOUT:-300}"
+WAITED=0
+until wget -q -O /dev/null http://127.0.0.1:8001/api/readyz 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$WAITED" -ge "$READY_TIMEOUT" ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 1
+    WAITED=$((WAITED + 1))
+done
+echo "Backend ready after ${WAITED}s"
 
 # Start Nginx
 nginx -g 'daemon off;' &
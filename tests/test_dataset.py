@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import server
+
+DISEASES = [
+    {
+        "disease": "Influenza", "symptoms": ["fever", "cough", "fever"],
+        "description": "Viral infection", "precautions": ["rest", "fluids"], "medicines": ["Oseltamivir"],
+    },
+    {
+        "disease": "Fièvre jaune", "symptoms": ["fièvre", "ictère", "douleur à l'estomac"],
+        "description": "Transmise par les moustiques — 黄熱病", "precautions": [], "medicines": ["Paracétamol"],
+    },
+    {
+        "id": "custom-id", "disease": "Common cold", "symptoms": ["cough", "sneezing"],
+        "description": "", "precautions": ["rest"], "medicines": [],
+    },
+]
+
+
+class CompiledCatalogTest(unittest.TestCase):
+    """Compiled catalogs read back exactly like the in-memory catalog of the same records"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_json(self, name, data):
+        with open(self.path(name), "w", encoding="utf-8") as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        return self.path(name)
+
+    def write_csv(self, name, data):
+        with open(self.path(name), "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=server.DISEASE_FIELDS)
+            writer.writeheader()
+            for disease in data:
+                writer.writerow({
+                    field: ";".join(value) if field in server.LIST_FIELDS else value
+                    for field, value in disease.items()
+                })
+        return self.path(name)
+
+    def compile(self, source):
+        count = server.build_dataset(source, self.path("catalog.bin"))
+        catalog = server.read_medical_data(self.path("catalog.bin"))
+        self.assertIsInstance(catalog, server.CompiledCatalog)
+        self.assertEqual(len(catalog), count)
+        return catalog
+
+    def check(self, catalog, data):
+        expected = server.InternedCatalog(server.assign_disease_ids(data))
+        self.assertEqual(list(catalog), list(expected))
+        self.assertEqual(catalog.disease_ids(), expected.disease_ids())
+        self.assertEqual(catalog.version, expected.version)
+        for disease_idx in range(len(expected)):
+            self.assertEqual(
+                [catalog.symptom(symptom_id) for symptom_id in catalog.symptom_ids(disease_idx)],
+                expected[disease_idx]["symptoms"],
+            )
+
+    def test_json_round_trip(self):
+        catalog = self.compile(self.write_json("diseases.json", DISEASES))
+        self.check(catalog, DISEASES)
+        self.assertEqual(catalog[-1]["id"], "custom-id")
+        self.assertEqual(catalog[1:], list(catalog)[1:])
+        with self.assertRaises(IndexError):
+            catalog[len(DISEASES)]
+
+    def test_csv_round_trip(self):
+        catalog = self.compile(self.write_csv("diseases.csv", DISEASES))
+        self.check(catalog, DISEASES)
+        self.assertEqual(server.read_csv_dataset(self.path("diseases.csv"))[1]["symptoms"], DISEASES[1]["symptoms"])
+
+    def test_snapshot_of_compiled_catalog(self):
+        catalog = self.compile(self.write_json("diseases.json", DISEASES))
+        compiled = server.DatasetSnapshot(catalog, 1)
+        loaded = server.DatasetSnapshot(DISEASES, 2)
+        self.assertEqual(compiled.version, loaded.version)
+        self.assertEqual(compiled.index_by_id, loaded.index_by_id)
+        self.assertEqual(compiled.engine.rank(["cough", "fever"], 5, 0.0), loaded.engine.rank(["cough", "fever"], 5, 0.0))
+
+    def test_empty_dataset(self):
+        catalog = self.compile(self.write_json("empty.json", []))
+        self.check(catalog, [])
+        self.assertEqual(len(catalog), 0)
+
+    def test_missing_fields_rejected(self):
+        source = self.write_json("partial.json", [{"disease": "Influenza", "symptoms": ["fever"]}])
+        with self.assertRaises(ValueError):
+            server.build_dataset(source, self.path("catalog.bin"))
+
+    def test_bad_magic_rejected(self):
+        server.build_dataset(self.write_json("diseases.json", DISEASES), self.path("catalog.bin"))
+        with open(self.path("catalog.bin"), "rb") as handle:
+            content = handle.read()
+        with open(self.path("format.bin"), "wb") as handle:
+            # Right magic, unknown format version
+            handle.write(content[:8] + b"\x63" + content[9:])
+        with self.assertRaises(ValueError):
+            server.CompiledCatalog(self.path("format.bin"))
+        with open(self.path("magic.bin"), "wb") as handle:
+            handle.write(b"NOTADSET" + content[8:])
+        with self.assertRaises(ValueError):
+            server.CompiledCatalog(self.path("magic.bin"))
+
+    def test_truncated_file_rejected(self):
+        server.build_dataset(self.write_json("diseases.json", DISEASES), self.path("catalog.bin"))
+        with open(self.path("catalog.bin"), "rb") as handle:
+            content = handle.read()
+        for size in (4, server.CompiledCatalog.HEADER.size + 8, len(content) // 2, len(content) - 1):
+            with open(self.path("truncated.bin"), "wb") as handle:
+                handle.write(content[:size])
+            with self.assertRaises(ValueError, msg=size):
+                server.CompiledCatalog(self.path("truncated.bin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+import server
+
+
+def scoring_jobs(strategy):
+    return server.REGISTRY.get_sample_value("curely_scoring_jobs_total", {"strategy": strategy}) or 0.0
+
+
+def executor(mode, queue_max=64):
+    return server.ScoringExecutor(mode, inline_cost=10, process_cost=1000, threads=2, processes=2, queue_max=queue_max)
+
+
+class ScoringStrategyTest(unittest.TestCase):
+    """Where a scoring call runs, by executor mode and call cost"""
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            executor("gpu")
+
+    def test_inline_mode(self):
+        scoring = executor("inline")
+        scoring.start()
+        self.addCleanup(scoring.shutdown)
+        self.assertEqual([scoring.strategy(cost) for cost in (1, 100, 10 ** 6)], ["inline"] * 3)
+
+    def test_thread_mode(self):
+        scoring = executor("thread")
+        # Nothing leaves the event loop before the pools are started
+        self.assertEqual(scoring.strategy(100), "inline")
+        scoring.start()
+        self.addCleanup(scoring.shutdown)
+        self.assertEqual([scoring.strategy(cost) for cost in (10, 11, 10 ** 6)], ["inline", "thread", "thread"])
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "scoring processes are forked")
+    def test_process_mode(self):
+        scoring = executor("process")
+        scoring.start()
+        self.addCleanup(scoring.shutdown)
+        self.assertEqual([scoring.strategy(cost) for cost in (10, 999, 1000)], ["inline", "thread", "process"])
+        self.assertEqual(scoring.strategy(1000, processes=False), "thread")
+
+
+class ScoringExecutorTest(unittest.IsolatedAsyncioTestCase):
+    """Every strategy ranks the same, and a saturated executor answers 429"""
+
+    async def rank(self, scoring, batch):
+        scoring.start()
+        try:
+            return await scoring.rank_batch(server.SNAPSHOT, "python", batch, 5)
+        finally:
+            scoring.shutdown()
+
+    async def test_strategies_rank_alike(self):
+        snapshot = server.SNAPSHOT
+        batch = [["itching", "skin_rash"], ["cough", "high_fever", "headache"], ["vomiting"]] * 10
+        expected = snapshot.engine.rank_batch(batch, 5)
+        cost = len(batch) * len(snapshot.data)
+        modes = ["inline", "thread"]
+        if "fork" in multiprocessing.get_all_start_methods():
+            modes.append("process")
+        for mode in modes:
+            strategy = "thread" if mode == "thread" else mode
+            before = scoring_jobs(strategy)
+            scoring = server.ScoringExecutor(mode, inline_cost=0, process_cost=cost, threads=2, processes=2, queue_max=8)
+            self.assertEqual(await self.rank(scoring, batch), expected, mode)
+            self.assertEqual(scoring_jobs(strategy) - before, 1, mode)
+
+    async def test_saturated_executor_answers_429(self):
+        server.PREDICTION_CACHE.clear()
+        scoring = server.ScoringExecutor("thread", inline_cost=0, process_cost=10 ** 9, threads=4, processes=1, queue_max=1)
+        rank_batch = server.SNAPSHOT.engine.rank_batch
+        
+        def slow_rank_batch(*args):
+            time.sleep(0.3)
+            return rank_batch(*args)
+        
+        scoring.start()
+        self.addCleanup(scoring.shutdown)
+        before = scoring_jobs("rejected")
+        transport = httpx.ASGITransport(app=server.app)
+        with mock.patch.object(server, "SCORING_EXECUTOR", scoring), \
+                mock.patch.object(server.SNAPSHOT.engine, "rank_batch", slow_rank_batch):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                # Different symptom sets, so no request joins another one's computation
+                responses = await asyncio.gather(*(
+                    client.post("/api/predict-disease", json={"symptoms": [symptom]})
+                    for symptom in ("itching", "cough", "vomiting", "headache")
+                ))
+        
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200, 429, 429, 429])
+        for response in responses:
+            if response.status_code == 429:
+                self.assertEqual(response.headers["Retry-After"], str(server.SCORING_RETRY_AFTER))
+        self.assertEqual(scoring_jobs("rejected") - before, 3)
+        self.assertEqual(scoring.pending, 0)
+
+    async def test_run_without_reject_waits(self):
+        scoring = server.ScoringExecutor("thread", inline_cost=0, process_cost=10 ** 9, threads=1, processes=1, queue_max=1)
+        scoring.start()
+        self.addCleanup(scoring.shutdown)
+        results = await asyncio.gather(
+            scoring.run(100, time.sleep, 0.1),
+            scoring.run(100, sum, [1, 2], reject=False),
+        )
+        self.assertEqual(results, [None, 3])
+        with self.assertRaises(server.ScoringSaturated):
+            await asyncio.gather(scoring.run(100, time.sleep, 0.1), scoring.run(100, sum, [1, 2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
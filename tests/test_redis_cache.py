@@ -0,0 +1,78 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import server
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - fakeredis is only needed for these tests
+    fakeredis = None
+
+
+class RedisCacheTest(unittest.TestCase):
+    """The shared tier round-trips results and degrades to computing without Redis"""
+
+    def setUp(self):
+        self.cache = server.REDIS_CACHE
+        self.client = TestClient(server.app)
+        server.PREDICTION_CACHE.clear()
+
+    def tearDown(self):
+        server.REDIS_CACHE = self.cache
+        server.PREDICTION_CACHE.clear()
+
+    def predict(self, symptoms):
+        response = self.client.post("/api/predict-disease", json={"symptoms": symptoms})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def search(self, query):
+        response = self.client.get("/api/search-diseases", params={"query": query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+    def test_round_trip(self):
+        server.REDIS_CACHE = server.RedisCache(fakeredis.FakeAsyncRedis())
+        computed = self.predict(["fever", "cough"])
+        searched = self.search("hepatitis")
+        self.assertEqual(server.REDIS_CACHE.stats()["hits"], 0)
+        
+        # Another worker: nothing in process, everything from Redis
+        server.PREDICTION_CACHE.clear()
+        self.assertEqual(self.predict(["Cough", "fever"]), computed)
+        self.assertEqual(self.search("HEPATITIS"), searched)
+        stats = server.REDIS_CACHE.stats()
+        self.assertEqual((stats["hits"], stats["errors"]), (2, 0))
+
+    @unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+    def test_session_shared(self):
+        server.REDIS_CACHE = server.RedisCache(fakeredis.FakeAsyncRedis())
+        step = self.client.post("/api/sessions", json={"symptoms": ["fever"], "top_k": 3}).json()
+        session_id = step["session_id"]
+        
+        # Another worker: the session record comes from Redis
+        server.PREDICTION_SESSIONS.delete(session_id)
+        server.SESSION_STATES.discard(session_id)
+        step = self.client.patch(f"/api/sessions/{session_id}", json={"add": ["cough"]}).json()
+        self.assertEqual(step["symptoms"], ["cough", "fever"])
+        server.PREDICTION_SESSIONS.delete(session_id)
+        self.assertEqual(self.client.delete(f"/api/sessions/{session_id}").status_code, 200)
+        self.assertEqual(self.client.get(f"/api/sessions/{session_id}").status_code, 404)
+
+    @unittest.skipIf(server.aioredis is None, "redis is not installed")
+    def test_unreachable_redis_computes(self):
+        expected = self.predict(["fever", "cough"])
+        searched = self.search("hepatitis")
+        server.PREDICTION_CACHE.clear()
+        server.REDIS_CACHE = server.RedisCache.from_url("redis://127.0.0.1:1", retry_after=30.0)
+        
+        self.assertEqual(self.predict(["fever", "cough"]), expected)
+        self.assertEqual(self.search("hepatitis"), searched)
+        stats = server.REDIS_CACHE.stats()
+        self.assertEqual((stats["enabled"], stats["available"], stats["errors"]), (True, False, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import random
+import unittest
+
+import server
+
+
+def synthetic_catalog(seed, size=400):
+    """Diseases with overlapping symptoms, so exact and partial matches mix"""
+    rng = random.Random(seed)
+    vocabulary = [f"sym_{i}" for i in range(60)] + [
+        "fever", "high_fever", "mild_fever", "pain", "joint_pain", "back_pain", "pain in back", "cough",
+    ]
+    diseases = []
+    for disease_idx in range(size):
+        symptoms = rng.sample(vocabulary, rng.randint(1, 10))
+        if disease_idx % 13 == 0:
+            # The same symptom listed twice counts twice
+            symptoms.append(symptoms[0])
+        diseases.append({
+            "disease": f"Disease {disease_idx}", "symptoms": symptoms,
+            "description": "", "precautions": [], "medicines": [],
+        })
+    return diseases, vocabulary + ["fever", "pain", "sym 1", "sym", "1", "back", "unknown symptom", "high fever pain"]
+
+
+def reference_rank(data, normalized_user, limit, min_confidence):
+    """The original ranking: calculate_confidence over every disease, stable sort by rounded confidence"""
+    scored = []
+    for disease_idx, disease in enumerate(data):
+        confidence, matching = server.calculate_confidence(normalized_user, disease["symptoms"])
+        if confidence > 0:
+            scored.append((disease_idx, round(confidence, 1), matching))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [item for item in scored if item[1] >= min_confidence][:limit]
+
+
+class ScoringEngineEquivalenceTest(unittest.TestCase):
+    """Every heuristic engine ranks exactly like the original brute-force scan"""
+
+    engines = ("python", "numpy")
+
+    def check(self, data, symptoms, rng, rounds):
+        index = server.SymptomIndex(server.InternedCatalog(server.assign_disease_ids(data)))
+        engines = {name: server.create_scoring_engine(name, index) for name in self.engines}
+        for _ in range(rounds):
+            user = [rng.choice(symptoms) for _ in range(rng.randint(1, 8))]
+            normalized_user = sorted({server.normalize_symptom(symptom) for symptom in user})
+            limit = rng.choice([1, 3, 5, 10, 50])
+            min_confidence = rng.choice([0.0, 0.0, 10.0, 33.3, 50.0, 95.0])
+            expected = reference_rank(data, normalized_user, limit, min_confidence)
+            for name, engine in engines.items():
+                self.assertEqual(engine.rank(normalized_user, limit, min_confidence), expected, (name, normalized_user))
+            batch = [normalized_user, normalized_user[:1]]
+            for name, engine in engines.items():
+                self.assertEqual(
+                    engine.rank_batch(batch, limit, min_confidence),
+                    [engine.rank(normalized_user, limit, min_confidence) for normalized_user in batch],
+                    name,
+                )
+
+    def test_medical_dataset(self):
+        data = list(server.SNAPSHOT.data)
+        symptoms = sorted({symptom for disease in data for symptom in disease["symptoms"]})
+        symptoms += ["fever", "pain", "skin", "eye", "stomach", "HIGH_FEVER", "joint pain and fever", "x", ""]
+        self.check(data, symptoms, random.Random(0), 300)
+
+    def test_synthetic_catalogs(self):
+        for seed in range(3):
+            data, symptoms = synthetic_catalog(seed)
+            self.check(data, symptoms, random.Random(seed), 200)
+
+    def test_incomplete_engine(self):
+        class RankOnlyEngine(server.ScoringEngine):
+            name = "rank-only"
+        
+        with self.assertRaises(TypeError):
+            RankOnlyEngine(server.SNAPSHOT.symptom_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
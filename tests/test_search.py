@@ -0,0 +1,109 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import server
+
+DISEASES = [
+    {"disease": "Influenza", "symptoms": ["high fever", "cough"], "description": "Viral infection of the respiratory tract"},
+    {"disease": "Pneumonia", "symptoms": ["cough", "chest pain", "fever"], "description": "Lung infection, can follow influenza"},
+    {"disease": "Migraine", "symptoms": ["headache", "nausea"], "description": "Recurring headaches"},
+    {"disease": "Malaria", "symptoms": ["fever", "chills"], "description": "Parasitic infection transmitted by mosquitoes"},
+]
+
+
+class DiseaseSearchIndexTest(unittest.TestCase):
+    """Exact, prefix and fuzzy matching of query tokens, all of which must match"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = server.DiseaseSearchIndex(DISEASES)
+
+    def search(self, query):
+        return self.index.search(" ".join(server.tokenize(query)))
+
+    def test_exact(self):
+        self.assertEqual(self.search("Migraine"), [2])
+        self.assertEqual(self.search("chills"), [3])
+
+    def test_prefix_of_last_token(self):
+        self.assertEqual(self.search("pneu"), [1])
+        self.assertEqual(self.search("lung infe"), [1])
+        # Only the last token is still being typed
+        self.assertEqual(self.search("pneu infection"), [])
+
+    def test_fuzzy(self):
+        # Distance 1 from tokens of 4 to 7 characters
+        self.assertEqual(self.search("malria"), [3])
+        self.assertEqual(self.search("cogh chest"), [1])
+        # Distance 2 from tokens of 8 characters or more
+        self.assertEqual(self.search("pnuemonia"), [1])
+        self.assertEqual(self.search("malxrix"), [])
+        # Tokens under 4 characters are never corrected
+        self.assertEqual(self.search("cof"), [])
+
+    def test_every_token_must_match(self):
+        self.assertEqual(sorted(self.search("fever cough")), [0, 1])
+        self.assertEqual(self.search("fever headache"), [])
+        self.assertEqual(self.search("infection fever mosquitoes"), [3])
+
+    def test_ranking(self):
+        # The name weighs more than the description
+        self.assertEqual(self.search("influenza"), [0, 1])
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(""), [])
+        self.assertEqual(self.search("?! -"), [])
+
+
+class SearchDiseasesApiTest(unittest.TestCase):
+    """Pagination, X-Total-Count and field projection of /api/search-diseases"""
+
+    def setUp(self):
+        self.client = TestClient(server.app)
+        self.data = list(server.SNAPSHOT.data)
+
+    def search(self, status_code=200, **params):
+        response = self.client.get("/api/search-diseases", params=params)
+        self.assertEqual(response.status_code, status_code, response.text)
+        return response
+
+    def test_whole_catalog_without_parameters(self):
+        self.assertEqual(self.search().json(), self.data)
+
+    def test_limit_offset_and_total(self):
+        response = self.search(limit=5)
+        self.assertEqual(response.headers["X-Total-Count"], str(len(self.data)))
+        self.assertEqual(response.json(), self.data[:5])
+        self.assertEqual(self.search(limit=5, offset=5).json(), self.data[5:10])
+        self.assertEqual(self.search(offset=len(self.data)).json(), [])
+        
+        matches = self.search(query="pain", limit=100)
+        total = int(matches.headers["X-Total-Count"])
+        self.assertEqual(len(matches.json()), total)
+        self.assertGreater(total, 2)
+        page = self.search(query="pain", limit=2, offset=1)
+        self.assertEqual(page.headers["X-Total-Count"], str(total))
+        self.assertEqual(page.json(), matches.json()[1:3])
+
+    def test_default_limit(self):
+        response = self.search(offset=0, fields="id")
+        self.assertEqual(len(response.json()), min(server.SEARCH_LIMIT_DEFAULT, len(self.data)))
+
+    def test_fields_projection(self):
+        response = self.search(query="hepatitis", fields="id, disease")
+        self.assertTrue(response.json())
+        for record in response.json():
+            self.assertEqual(list(record), ["id", "disease"])
+            self.assertIn("hepatitis", record["disease"].lower())
+
+    def test_unknown_field(self):
+        self.assertIn("nope", self.search(400, query="fever", fields="id,nope").json()["detail"])
+
+    def test_query_without_tokens(self):
+        response = self.search(query="?!")
+        self.assertEqual((response.json(), response.headers["X-Total-Count"]), ([], "0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import random
+import unittest
+
+from fastapi.testclient import TestClient
+
+import server
+from tests.test_scoring import synthetic_catalog
+
+
+class PredictionSessionEquivalenceTest(unittest.TestCase):
+    """A session refined step by step ranks like a full rescoring of its symptoms"""
+
+    def check(self, data, symptoms, rng, sessions, steps):
+        snapshot = server.DatasetSnapshot(server.assign_disease_ids(data), 1)
+        engine = server.PythonScoringEngine(snapshot.symptom_index)
+        pool = [server.normalize_symptom(symptom) for symptom in symptoms]
+        for _ in range(sessions):
+            limit = rng.choice([1, 3, 5, 10, 50, 400])
+            min_confidence = rng.choice([0.0, 0.0, 10.0, 33.3, 50.0, 95.0])
+            session = server.PredictionSession(snapshot, limit, min_confidence)
+            for _ in range(steps):
+                if session.symptoms and rng.random() < 0.4:
+                    session.remove(rng.choice(sorted(session.symptoms)))
+                else:
+                    session.add(rng.choice(pool))
+                expected = engine.rank(sorted(session.symptoms), limit, min_confidence) if session.symptoms else []
+                self.assertEqual(session.rank(), expected, sorted(session.symptoms))
+            session.sync(set())
+            self.assertEqual((session.counts, session.buckets, +session.partial_terms), ({}, {}, {}))
+
+    def test_medical_dataset(self):
+        data = list(server.SNAPSHOT.data)
+        symptoms = sorted({symptom for disease in data for symptom in disease["symptoms"]})
+        self.check(data, symptoms + ["fever", "pain", "skin", "eye", "stomach"], random.Random(0), 20, 25)
+
+    def test_synthetic_catalogs(self):
+        for seed in range(3):
+            data, symptoms = synthetic_catalog(seed)
+            self.check(data, symptoms, random.Random(seed), 20, 30)
+
+
+class SessionApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(server.app)
+
+    def forget(self, session_id):
+        """What another worker sees: no local record or counts"""
+        server.PREDICTION_SESSIONS.delete(session_id)
+        server.SESSION_STATES.discard(session_id)
+
+    def test_steps_match_predictions(self):
+        step = self.client.post("/api/sessions", json={"symptoms": ["fever"], "top_k": 3}).json()
+        session_id = step["session_id"]
+        step = self.client.patch(f"/api/sessions/{session_id}", json={"add": ["cough", "headache"]}).json()
+        self.assertTrue(step["changed"])
+        unchanged = self.client.patch(f"/api/sessions/{session_id}", json={}).json()
+        self.assertEqual((unchanged["ranking"], unchanged["changed"], unchanged["removed"]), (step["ranking"], [], []))
+        # Re-adding a symptom already in the session changes nothing either
+        unchanged = self.client.patch(f"/api/sessions/{session_id}", json={"add": ["Cough"]}).json()
+        self.assertEqual((unchanged["changed"], unchanged["removed"]), ([], []))
+        predictions = self.client.post("/api/predict-disease", json={"symptoms": step["symptoms"], "top_k": 3}).json()
+        self.assertEqual(step["ranking"], [prediction["id"] for prediction in predictions])
+        current = self.client.get(f"/api/sessions/{session_id}").json()
+        self.assertEqual(current["predictions"], predictions)
+        self.client.delete(f"/api/sessions/{session_id}")
+        self.assertEqual(self.client.get(f"/api/sessions/{session_id}").status_code, 404)
+
+    def test_restore_from_client_symptoms(self):
+        step = self.client.post("/api/sessions", json={"symptoms": ["fever", "cough"], "top_k": 5}).json()
+        session_id = step["session_id"]
+        self.forget(session_id)
+        self.assertEqual(self.client.patch(f"/api/sessions/{session_id}", json={"add": ["headache"]}).status_code, 404)
+        restored = self.client.patch(
+            f"/api/sessions/{session_id}",
+            json={"add": ["headache"], "symptoms": step["symptoms"], "top_k": 5},
+        ).json()
+        predictions = self.client.post("/api/predict-disease", json={"symptoms": restored["symptoms"], "top_k": 5}).json()
+        self.assertEqual(restored["ranking"], [prediction["id"] for prediction in predictions])
+
+    def test_delta(self):
+        first = self.client.post("/api/sessions", json={"symptoms": ["fever", "cough", "headache"], "top_k": 5}).json()
+        session_id = first["session_id"]
+        self.assertEqual([prediction["id"] for prediction in first["changed"]], first["ranking"])
+        step = self.client.patch(f"/api/sessions/{session_id}", json={"remove": ["headache", "cough"]}).json()
+        kept = set(first["ranking"]) & set(step["ranking"])
+        self.assertEqual(sorted(step["removed"]), sorted(set(first["ranking"]) - set(step["ranking"])))
+        # Every new entry is reported; entries kept are reported only if rescored
+        self.assertLessEqual(set(step["ranking"]) - kept, {prediction["id"] for prediction in step["changed"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
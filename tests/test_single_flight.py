@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+import server
+
+
+def coalesced(endpoint):
+    return server.REGISTRY.get_sample_value("curely_coalesced_total", {"endpoint": endpoint}) or 0.0
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    """Concurrent identical computations run once and share their outcome"""
+
+    async def test_concurrent_predictions_rank_once(self):
+        server.PREDICTION_CACHE.clear()
+        rank_batch = server.SCORING_EXECUTOR.rank_batch
+        calls = []
+        
+        async def slow_rank_batch(*args, **kwargs):
+            calls.append(args)
+            # Hold the computation so every request joins it
+            await asyncio.sleep(0.1)
+            return await rank_batch(*args, **kwargs)
+        
+        requests = 8
+        before = coalesced("predict")
+        transport = httpx.ASGITransport(app=server.app)
+        with mock.patch.object(server.SCORING_EXECUTOR, "rank_batch", slow_rank_batch):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                responses = await asyncio.gather(*(
+                    client.post("/api/predict-disease", json={"symptoms": ["itching", "skin_rash", "chills"]})
+                    for _ in range(requests)
+                ))
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalesced("predict") - before, requests - 1)
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(len({response.content for response in responses}), 1)
+        self.assertEqual(len(server.PREDICT_FLIGHTS), 0)
+
+    async def test_failure_reaches_every_waiter(self):
+        flight = server.SingleFlight("test")
+        calls = []
+        
+        async def fail():
+            calls.append(None)
+            await asyncio.sleep(0.05)
+            raise RuntimeError("scoring failed")
+        
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(5)), return_exceptions=True)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([type(result) for result in results], [RuntimeError] * 5)
+        self.assertEqual(len(flight), 0)
+        # Nothing is remembered: the next call computes again
+        with self.assertRaises(RuntimeError):
+            await flight.do("key", fail)
+        self.assertEqual(len(calls), 2)
+
+    async def test_waiter_cancelled_does_not_cancel_computation(self):
+        flight = server.SingleFlight("test")
+        
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 42
+        
+        first = asyncio.ensure_future(flight.do("key", compute))
+        second = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 42)
+
+    async def test_do_many_mixes_new_and_inflight_keys(self):
+        flight = server.SingleFlight("test")
+        computed = []
+        
+        async def compute(keys):
+            computed.append(keys)
+            await asyncio.sleep(0.05)
+            return [key * 10 for key in keys]
+        
+        results = await asyncio.gather(flight.do_many([1, 2], compute), flight.do_many([2, 3], compute))
+        self.assertEqual(results, [[10, 20], [20, 30]])
+        self.assertEqual(computed, [[1, 2], [3]])
+
+
+if __name__ == "__main__":
+    unittest.main()